@@ -4,6 +4,7 @@ Main entry point
 """
 
 import argparse
+import logging
 import os
 import sys
 
@@ -116,6 +117,9 @@ def main():
     
     args = parser.parse_args()
     
+    # Library modules log through `logging`; show their progress on the console
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
     # Set environment variables
     if args.mock_llm:
         os.environ['USE_MOCK_LLM'] = 'True'
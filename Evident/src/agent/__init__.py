@@ -1,22 +1,57 @@
 """Evident AI Agent - Main agent class"""
 
-from typing import Dict, Any, List, Optional
-from src.ingestion import SourceManager
-from src.rag import RAGEngine
-from src.smg import SMGManager
-from src.llm import LLMFactory, PromptTemplates
+import re
+import asyncio
+import itertools
+import logging
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 import src.config
 from src.agent.audit_logger import audit_logger
 
+logger = logging.getLogger(__name__)
+
+# Entity extraction patterns for graph lookups, compiled once at import
+_CVE_RE = re.compile(r'CVE-\d{4}-\d{4,}', re.IGNORECASE)
+_USER_RE = re.compile(r'(?:user|account|member)\s+([a-zA-Z0-9\._-]+)', re.IGNORECASE)
+_ASSET_RE = re.compile(r'(?:asset|host|server|vm)\s+([a-zA-Z0-9\._-]+)', re.IGNORECASE)
+
+# Number of recent questions compared against by the semantic cache tier
+_SEMANTIC_CACHE_WINDOW = 64
+
+# Rules framing the progress banners
+_BANNER = "=" * 60
+_WIDE_BANNER = "=" * 80
+
+
+def _log_banner(title: str, *args, rule: str = _BANNER):
+    """Log a title framed by rules as a single record, skipped entirely below INFO"""
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(rule + "\n" + title + "\n" + rule, *args)
+
+
+async def _to_thread_if(enabled: bool, func, *args):
+    """Run a blocking call in a worker thread, or return None when disabled"""
+    if not enabled:
+        return None
+    return await asyncio.to_thread(func, *args)
+
 
 class EvidentAgent:
     """Main Evident security intelligence agent"""
     
     def __init__(self, use_mock_llm: bool = None, use_mock_graph: bool = None):
-        print("\n" + "="*60)
-        print("Initializing Evident Security Intelligence Agent")
-        print("="*60)
+        _log_banner("Initializing Evident Security Intelligence Agent")
+        
+        # Heavy subsystems (pandas loaders, chromadb, neo4j, LLM SDKs) are
+        # imported here rather than at module load
+        from src.ingestion import SourceManager
+        from src.rag import RAGEngine
+        from src.smg import SMGManager
+        from src.llm import LLMFactory
         
         # Initialize components
         self.source_manager = SourceManager(data_path=src.config.app_config.ingestion.data_path)
@@ -28,36 +63,62 @@ class EvidentAgent:
         self.data_loaded = False
         self.graph_built = False
         
-        print(f"[OK] Agent initialized with {self.llm.config.name}")
-        print("="*60 + "\n")
+        # Entities are kept per source; the flat list is built on first access
+        self.entities_by_source: Dict[str, List[Any]] = {}
+        self._entities: Optional[List[Any]] = None
+        self._entity_count = 0
+        
+        # Query cache: exact LRU keyed by (question, use_graph, use_rag), plus an
+        # optional semantic tier over recent question embeddings
+        agent_cfg = src.config.app_config.agent
+        self._cache_size = agent_cfg.query_cache_size
+        self._semantic_threshold = agent_cfg.semantic_cache_threshold
+        self._exact_cache: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        self._semantic_index = deque(maxlen=_SEMANTIC_CACHE_WINDOW)
+        # Flask serves queries on worker threads; guards both cache tiers
+        self._cache_lock = threading.Lock()
+        
+        logger.info("Agent initialized with %s\n%s", self.llm.config.name, _BANNER)
     
-    def ingest_data(self):
-        """Ingest security data from all sources"""
-        print("\n" + "="*60)
-        print("STEP 1: Data Ingestion")
-        print("="*60)
+    def ingest_data(self) -> int:
+        """Ingest security data from all sources, returning the entity count"""
+        _log_banner("STEP 1: Data Ingestion")
         
         # Load all data sources
         all_entities = self.source_manager.load_all()
         
-        # Flatten entities - Reset before extending
-        self.entities = []
-        for source_name, entities in all_entities.items():
-            self.entities.extend(entities)
+        # Keep the per-source lists; drop any previously flattened view
+        self.entities_by_source = all_entities
+        self._entities = None
+        self._entity_count = sum(len(entities) for entities in all_entities.values())
         
-        print(f"\n[OK] Total entities loaded: {len(self.entities)}")
+        logger.info("Total entities loaded: %d", self._entity_count)
         self.data_loaded = True
         
-        return self.entities
+        # The flat list is built only if something reads self.entities
+        return self._entity_count
+    
+    @property
+    def entities(self) -> List[Any]:
+        """All loaded entities as one list, flattened once on first access"""
+        if self._entities is None:
+            # extend() copies each sized source list in one block; chain() has
+            # no length hint, so list(chain(...)) appends item by item
+            flat = []
+            for entities in self.entities_by_source.values():
+                flat.extend(entities)
+            self._entities = flat
+        return self._entities
 
     def rebuild_dataset(self):
         """Re-initialize source manager and rebuild the intelligence layer"""
-        print("\n" + "="*80)
-        print("REBUILDING INTELLIGENCE LAYER")
-        print("="*80)
+        _log_banner("REBUILDING INTELLIGENCE LAYER", rule=_WIDE_BANNER)
         
         # Reload config to get latest source_mode/data_path
         from src.config import config_loader
+        from src.ingestion import SourceManager
+        from src.rag import RAGEngine
+        from src.smg import SMGManager
         config = config_loader.load_config()
         
         # 1. Hard reset ChromaDB to avoid index corruption on schema switch
@@ -67,9 +128,9 @@ class EvidentAgent:
         if os.path.exists(chroma_path):
             try:
                 shutil.rmtree(chroma_path)
-                print(f"[OK] Cleared vector database directory: {chroma_path}")
+                logger.info("Cleared vector database directory: %s", chroma_path)
             except Exception as e:
-                print(f"[WARN] Could not clear vector database: {e}")
+                logger.warning("Could not clear vector database: %s", e)
 
         # Re-initialize SourceManager with new path
         self.source_manager = SourceManager(data_path=config.ingestion.data_path)
@@ -85,34 +146,47 @@ class EvidentAgent:
         # Re-build RAG and SMG
         self.build_intelligence()
         
-        return {"status": "success", "entities": len(self.entities)}
+        return {"status": "success", "entities": self._entity_count}
     
     def build_intelligence(self):
         """Build RAG index and SMG"""
         if not self.data_loaded:
-            print("[WARN] No data loaded. Run ingest_data() first.")
+            logger.warning("No data loaded. Run ingest_data() first.")
             return
         
-        print("\n" + "="*60)
-        print("STEP 2: Building Intelligence Layer")
-        print("="*60)
+        _log_banner("STEP 2: Building Intelligence Layer")
         
         # Build RAG index
-        print("\n[RAG] Indexing entities into vector database...")
-        self.rag_engine.index_entities(self.entities)
+        logger.info("[RAG] Indexing entities into vector database...")
+        # Streamed per source in batches; only the graph needs the flat list
+        self.rag_engine.index_entities(itertools.chain.from_iterable(self.entities_by_source.values()))
         
         # Build SMG
-        print("\n[SMG] Building security memory graph...")
+        logger.info("[SMG] Building security memory graph...")
         self.smg_manager.build_graph(self.entities)
         
+        # Answers computed against the previous data set are stale now
+        self.clear_cache()
         self.graph_built = True
         
-        print("\n" + "="*60)
-        print("[OK] Intelligence layer ready")
-        print("="*60)
+        _log_banner("Intelligence layer ready")
     
     def query(self, question: str, use_graph: bool = True, use_rag: bool = True) -> Dict[str, Any]:
-        """Query the agent"""
+        """Query the agent (blocking wrapper; await aquery() from async code)"""
+        coro = self.aquery(question, use_graph=use_graph, use_rag=use_rag)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+        
+        # Called on a thread that is running an event loop (e.g. an MCP server),
+        # where asyncio.run() refuses to nest: run on a private loop in a worker
+        # thread and block, as the synchronous query() always did
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, coro).result()
+    
+    async def aquery(self, question: str, use_graph: bool = True, use_rag: bool = True) -> Dict[str, Any]:
+        """Query the agent, running RAG retrieval and the graph lookup concurrently"""
         execution_steps = []
         execution_steps.append({
             "step": "Start Investigation",
@@ -127,22 +201,40 @@ class EvidentAgent:
                 "error": "Agent not initialized"
             }
         
-        print(f"\n{'='*60}")
-        print(f"Query: {question}")
-        print(f"{'='*60}")
+        _log_banner("Query: %s", question)
+        
+        cache_key = (question, use_graph, use_rag)
+        cached, question_vec = await self._cache_get(cache_key)
+        if cached is not None:
+            return self._serve_cached(question, cached, execution_steps)
         
         # Retrieve context
         context_parts = []
         sources = []
         
         if use_rag:
-            print("\n[RAG] Retrieving relevant documents...")
+            logger.info("[RAG] Retrieving relevant documents...")
             execution_steps.append({
                 "step": "RAG Retrieval",
                 "description": "Querying vector database for similar documents...",
                 "timestamp": datetime.now().isoformat()
             })
-            rag_context = self.rag_engine.retrieve_context(question)
+        
+        if use_graph:
+            logger.info("[SMG] Querying security graph...")
+            execution_steps.append({
+                "step": "Graph Query",
+                "description": "Traversing security memory graph for connected entities...",
+                "timestamp": datetime.now().isoformat()
+            })
+        
+        # The vector search and the graph traversal don't depend on each other
+        rag_context, graph_context = await asyncio.gather(
+            _to_thread_if(use_rag, self.rag_engine.retrieve_context, question),
+            _to_thread_if(use_graph, self._query_graph_for_context, question),
+        )
+        
+        if use_rag:
             context_parts.append(f"=== Vector Database Results ===\n{rag_context}")
             sources.append("Vector Database")
             execution_steps.append({
@@ -151,27 +243,20 @@ class EvidentAgent:
                 "timestamp": datetime.now().isoformat()
             })
         
-        if use_graph:
-            print("[SMG] Querying security graph...")
+        if graph_context:
+            context_parts.append(f"\n=== Security Graph Results ===\n{graph_context}")
+            sources.append("Security Memory Graph")
             execution_steps.append({
-                "step": "Graph Query",
-                "description": "Traversing security memory graph for connected entities...",
+                "step": "Graph Query Complete",
+                "description": "Found connected entities in security graph.",
                 "timestamp": datetime.now().isoformat()
             })
-            graph_context = self._query_graph_for_context(question)
-            if graph_context:
-                context_parts.append(f"\n=== Security Graph Results ===\n{graph_context}")
-                sources.append("Security Memory Graph")
-                execution_steps.append({
-                    "step": "Graph Query Complete",
-                    "description": "Found connected entities in security graph.",
-                    "timestamp": datetime.now().isoformat()
-                })
         
         # Combine context
         full_context = "\n\n".join(context_parts) if context_parts else "No relevant context found."
         
         # Build prompt
+        from src.llm import PromptTemplates
         prompt = PromptTemplates.build_prompt(question, full_context, "investigation")
         
         # Generate response
@@ -181,17 +266,16 @@ class EvidentAgent:
         if is_fallback:
             trace_desc = f"⚠️ Fallback Active: Generating response using {llm_name}..."
 
-        print(f"[LLM] {trace_desc}")
+        logger.info("[LLM] %s", trace_desc)
         execution_steps.append({
             "step": "LLM Inference",
             "description": trace_desc,
             "timestamp": datetime.now().isoformat()
         })
-        llm_response = self.llm.generate(prompt, context=full_context)
+        # Off the event loop, so concurrent aquery() calls overlap their LLM round trips
+        llm_response = await asyncio.to_thread(self.llm.generate, prompt, context=full_context)
         
-        print(f"\n{'='*60}")
-        print("Response generated")
-        print(f"{'='*60}\n")
+        _log_banner("Response generated")
         
         execution_steps.append({
             "step": "Complete",
@@ -211,7 +295,7 @@ class EvidentAgent:
             context_summary=full_context[:200] + "..." if len(full_context) > 200 else full_context
         )
 
-        return {
+        response = {
             "answer": llm_response["text"],
             "sources": sources,
             "context": full_context[:500] + "..." if len(full_context) > 500 else full_context,
@@ -220,49 +304,153 @@ class EvidentAgent:
             "cost": llm_response.get("cost", 0.0),
             "interaction_id": interaction_id
         }
-    
-    def _query_graph_for_context(self, question: str) -> str:
-        """Query SMG for relevant context using entities extracted from question"""
-        context_parts = []
         
-        # 1. Extract potential entities from the question
-        import re
+        # Provider errors are returned as answers; don't pin them in the cache
+        if "error" not in llm_response:
+            self._cache_put(cache_key, response, question_vec)
+        
+        return response
+    
+    def clear_cache(self):
+        """Drop all cached query responses"""
+        with self._cache_lock:
+            self._exact_cache.clear()
+            self._semantic_index.clear()
+    
+    async def _cache_get(self, cache_key: tuple) -> Tuple[Optional[Dict[str, Any]], Any]:
+        """
+        Look up a cached response
+        
+        Returns:
+            Tuple of (cached response or None, question embedding or None).
+            The embedding is handed back so a miss can be cached without re-encoding.
+        """
+        if self._cache_size <= 0:
+            return None, None
+        
+        with self._cache_lock:
+            hit = self._exact_cache.get(cache_key)
+            if hit is not None:
+                self._exact_cache.move_to_end(cache_key)
+                return hit, None
+        
+        # Encoded outside the lock and off the event loop, so other lookups
+        # and queries aren't held up
+        question_vec = await asyncio.to_thread(self._embed_for_cache, cache_key[0])
+        if question_vec is None:
+            return None, None
+        
+        flags = cache_key[1:]
+        with self._cache_lock:
+            for cached_flags, cached_vec, cached_key in reversed(self._semantic_index):
+                if cached_flags != flags or cached_key not in self._exact_cache:
+                    continue
+                if float(cached_vec @ question_vec) >= self._semantic_threshold:
+                    self._exact_cache.move_to_end(cached_key)
+                    return self._exact_cache[cached_key], question_vec
+        
+        return None, question_vec
+    
+    def _cache_put(self, cache_key: tuple, response: Dict[str, Any], question_vec: Any = None):
+        """Store a response, evicting the least recently used entry when full"""
+        if self._cache_size <= 0:
+            return
         
-        # CVE IDs
-        cve_pattern = r'CVE-\d{4}-\d{4,}'
-        cves = re.findall(cve_pattern, question, re.IGNORECASE)
+        with self._cache_lock:
+            self._exact_cache[cache_key] = response
+            self._exact_cache.move_to_end(cache_key)
+            if len(self._exact_cache) > self._cache_size:
+                self._exact_cache.popitem(last=False)
+            
+            if question_vec is not None:
+                self._semantic_index.append((cache_key[1:], question_vec, cache_key))
+    
+    def _embed_for_cache(self, question: str) -> Any:
+        """Unit-normalized question embedding for the semantic tier (None when disabled)"""
+        if self._semantic_threshold <= 0:
+            return None
+        vector_store = self.rag_engine.vector_store
+        if getattr(vector_store, "embedding_model", None) is None:
+            return None
+        
+        # Same cached encoding RAG retrieval uses, so a miss encodes the question once
+        import numpy as np
+        vec = np.asarray(vector_store.encode_query(question), dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else None
+    
+    def _serve_cached(self, question: str, cached: Dict[str, Any],
+                      execution_steps: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Return a cached answer, still recording the interaction for audit"""
+        logger.info("[CACHE] Serving cached response")
+        execution_steps.append({
+            "step": "Cache Hit",
+            "description": "Answer served from the query cache; no retrieval or LLM call made.",
+            "timestamp": datetime.now().isoformat()
+        })
         
-        # IP Addresses
-        ip_pattern = r'\b(?:\d{1,3}\.){3}\d{1,3}\b'
-        ips = re.findall(ip_pattern, question)
+        interaction_id = audit_logger.log_interaction(
+            query=question,
+            response=cached["answer"],
+            model=cached["model"],
+            tokens=0,
+            cost=0.0,
+            execution_steps=execution_steps,
+            context_summary=cached["context"][:200]
+        )
         
-        # Usernames (common formats)
-        user_match = re.search(r'(?:user|account|member)\s+([a-zA-Z0-9\._-]+)', question, re.IGNORECASE)
-        usernames = [user_match.group(1)] if user_match else []
+        return {**cached, "tokens": 0, "cost": 0.0, "interaction_id": interaction_id, "cached": True}
+    
+    def _query_graph_for_context(self, question: str) -> str:
+        """Query SMG for relevant context using entities extracted from question"""
+        context_parts = []
         
-        # Hostnames/Assets (e.g. "asset server-01")
-        asset_match = re.search(r'(?:asset|host|server|vm)\s+([a-zA-Z0-9\._-]+)', question, re.IGNORECASE)
-        hostnames = [asset_match.group(1)] if asset_match else []
+        # Each handler extracts one kind of entity from the question and
+        # returns the graph context found for it, in table order
+        for handler in self._GRAPH_CONTEXT_HANDLERS:
+            context_parts.extend(handler(self, question))
         
-        # 2. Query SMG for each extracted entity
-        for cve_id in cves:
+        if not context_parts:
+            stats = self.smg_manager.get_stats()
+            context_parts.append(f"Security Graph Overview: {stats.get('node_count', 0)} entities and {stats.get('relationship_count', 0)} connections are available for cross-source correlation.")
+            
+        return "\n\n".join(context_parts) if context_parts else ""
+    
+    def _cve_graph_context(self, question: str) -> List[str]:
+        """Assets affected by each CVE ID in the question"""
+        context_parts = []
+        for cve_id in _CVE_RE.findall(question):
             cve_id = cve_id.upper()
             assets = self.smg_manager.get_assets_affected_by_cve(cve_id)
             if assets:
                 asset_list = [f"- {a['properties'].get('hostname', a['properties'].get('id'))} ({a['properties'].get('criticality', 'medium')} criticality)" 
                              for a in assets[:10]]
                 context_parts.append(f"Assets known to be affected by {cve_id}:\n" + "\n".join(asset_list))
+        return context_parts
+    
+    def _user_graph_context(self, question: str) -> List[str]:
+        """Permissions of the user named in the question (e.g. "user john.doe")"""
+        user_match = _USER_RE.search(question)
+        if not user_match:
+            return []
+        
+        username = user_match.group(1)
+        permissions = self.smg_manager.get_user_permissions(username)
+        if not permissions:
+            return []
+        perm_list = [f"- Action: {p['properties'].get('action')} on {p['properties'].get('resource_type')} (Scope: {p['properties'].get('scope')})" 
+                    for p in permissions[:10]]
+        return [f"Identified permissions for user '{username}':\n" + "\n".join(perm_list)]
+    
+    def _asset_graph_context(self, question: str) -> List[str]:
+        """Focus line for the asset named in the question (e.g. "asset server-01")"""
+        context_parts = []
+        asset_match = _ASSET_RE.search(question)
+        hostnames = [asset_match.group(1)] if asset_match else []
         
-        for username in usernames:
-            permissions = self.smg_manager.get_user_permissions(username)
-            if permissions:
-                perm_list = [f"- Action: {p['properties'].get('action')} on {p['properties'].get('resource_type')} (Scope: {p['properties'].get('scope')})" 
-                            for p in permissions[:10]]
-                context_parts.append(f"Identified permissions for user '{username}':\n" + "\n".join(perm_list))
-            
         for hostname in hostnames:
             asset_nodes = []
-            for e in self.entities:
+            for e in itertools.chain.from_iterable(self.entities_by_source.values()):
                 if hasattr(e, "entity_type") and e.entity_type == "asset" and e.hostname == hostname:
                     asset_nodes.append(e)
                 elif hasattr(e, "class_name"):
@@ -276,19 +464,17 @@ class EvidentAgent:
                     context_parts.append(f"Security focus on asset: {hostname} (Type: {entity.asset_type}, Criticality: {entity.criticality})")
                 else:
                     context_parts.append(f"Security focus on asset: {hostname} (OCSF Entity Activity: {entity.class_name})")
-        
-        if not context_parts:
-            stats = self.smg_manager.get_stats()
-            context_parts.append(f"Security Graph Overview: {stats.get('node_count', 0)} entities and {stats.get('relationship_count', 0)} connections are available for cross-source correlation.")
-            
-        return "\n\n".join(context_parts) if context_parts else ""
+        return context_parts
+    
+    # Graph-context handlers run by _query_graph_for_context, in output order
+    _GRAPH_CONTEXT_HANDLERS = (_cve_graph_context, _user_graph_context, _asset_graph_context)
     
     def get_stats(self) -> Dict[str, Any]:
         """Get agent statistics"""
         return {
             "data_loaded": self.data_loaded,
             "graph_built": self.graph_built,
-            "total_entities": len(self.entities) if self.data_loaded else 0,
+            "total_entities": self._entity_count if self.data_loaded else 0,
             "source_status": self.source_manager.get_source_status(),
             "rag_stats": self.rag_engine.get_stats() if self.graph_built else {},
             "smg_stats": self.smg_manager.get_stats() if self.graph_built else {},
@@ -9,10 +9,15 @@ The ConfigLoader merges both into a single AppConfig at runtime.
 
 import json
 import os
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:  # optional: stdlib json parses the same files, just slower
+    orjson = None
+
 # Load environment variables using absolute path to ensure discovery from any CWD
 _base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 _env_path = os.path.join(_base_dir, ".env")
@@ -36,6 +41,9 @@ class LLMConfig(BaseModel):
     capabilities: List[str] = Field(default_factory=lambda: ["general", "security"])
     api_key: Optional[str] = None
     endpoint: Optional[str] = None
+    # MockLLM only: sleep for a random duration in latency_range (seconds) per call
+    simulate_latency: bool = False
+    latency_range: Tuple[float, float] = (0.5, 1.5)
 
 
 class VectorDBConfig(BaseModel):
@@ -43,6 +51,12 @@ class VectorDBConfig(BaseModel):
     path: str = Field(default="data/chroma_db")
     collection_name: str = Field(default="evident_security")
     embedding_model: str = Field(default="all-MiniLM-L6-v2")
+    # "torch", or "onnx"/"openvino" for sentence-transformers>=3.2 with optimum installed
+    embedding_backend: str = Field(default="torch")
+    # Backend-specific weights, e.g. "onnx/model_qint8_avx512_vnni.onnx"
+    embedding_model_file: Optional[str] = None
+    # "cpu", or "cuda" to encode with fp16 weights on a GPU (torch backend only)
+    embedding_device: str = Field(default="cpu")
 
 
 class GraphDBConfig(BaseModel):
@@ -108,6 +122,8 @@ class AgentConfig(BaseModel):
     retrieval_top_k: int = Field(default=5)
     graph_traversal_depth: int = Field(default=3)
     enable_reasoning_trace: bool = Field(default=True)
+    query_cache_size: int = Field(default=256)  # 0 disables the query cache
+    semantic_cache_threshold: float = Field(default=0.0)  # cosine cut-off, e.g. 0.95; 0 disables
 
 
 # ---------------------------------------------------------------------------
@@ -175,13 +191,17 @@ class ConfigLoader:
 
         self._config: Optional[AppConfig] = None
 
+        # Parsed JSON per file, keyed by path -> ((mtime_ns, size), data), so a
+        # reload() without an on-disk change skips the read + parse
+        self._file_cache: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+
     # ------------------------------------------------------------------
     # Public API
     # ------------------------------------------------------------------
 
     def load_config(self) -> AppConfig:
         """Merge user + system config into a single AppConfig."""
-        if self._config:
+        if self._config is not None:
             self._update_data_path()
             return self._config
 
@@ -236,7 +256,6 @@ class ConfigLoader:
 
     def is_mock_mode(self, component: str = "llm") -> bool:
         """Check if running in mock mode via config or environment variable."""
-        config = self.load_config()
         if component == "llm":
             return os.getenv("USE_MOCK_LLM", "False").lower() == "true"
         elif component == "graph":
@@ -244,30 +263,47 @@ class ConfigLoader:
             env_mock = os.getenv("USE_MOCK_GRAPH")
             if env_mock is not None:
                 return env_mock.lower() == "true"
-            return config.graph_db.type == "mock"
+            return self.load_config().graph_db.type == "mock"
         return False
 
     # ------------------------------------------------------------------
     # Internal helpers
     # ------------------------------------------------------------------
 
+    def _read_json(self, path: str) -> Dict[str, Any]:
+        """Parse a config file, reusing the previous parse while the file is unchanged.
+
+        Pydantic builds fresh containers on validation, so handing the same
+        dict to a new model never leaks in-memory edits between reloads.
+        """
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        cached = self._file_cache.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+        print(f"[DEBUG] Loading {os.path.basename(path)} from: {path}")
+        with open(path, "rb") as f:
+            raw = f.read()
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+        self._file_cache[path] = (stamp, data)
+        return data
+
     def _load_user_config(self) -> UserConfig:
-        if os.path.exists(self.user_config_path):
-            print(f"[DEBUG] Loading user-config from: {self.user_config_path}")
-            with open(self.user_config_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            return UserConfig(**data)
-        print(f"[DEBUG] user-config.json not found, using defaults")
-        return self._default_user_config()
+        try:
+            data = self._read_json(self.user_config_path)
+        except FileNotFoundError:
+            print(f"[DEBUG] user-config.json not found, using defaults")
+            return self._default_user_config()
+        return UserConfig(**data)
 
     def _load_system_config(self) -> SystemConfig:
-        if os.path.exists(self.system_config_path):
-            print(f"[DEBUG] Loading system-config from: {self.system_config_path}")
-            with open(self.system_config_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            return SystemConfig(**data)
-        print(f"[DEBUG] system-config.json not found, using defaults")
-        return SystemConfig()
+        try:
+            data = self._read_json(self.system_config_path)
+        except FileNotFoundError:
+            print(f"[DEBUG] system-config.json not found, using defaults")
+            return SystemConfig()
+        return SystemConfig(**data)
 
     def _save_user_config(self, app_config: AppConfig):
         user = UserConfig(llms=app_config.llms, ingestion=app_config.ingestion)
@@ -324,16 +360,17 @@ class ConfigLoader:
         root = os.path.dirname(self._root)
 
         if mode in ("livedata", "cloud"):
-            self._config.ingestion.data_path = os.path.join(
-                self._root, "data", "livedata", "dataplugs_singnals"
-            )
+            data_path = os.path.join(self._root, "data", "livedata", "dataplugs_singnals")
         else:  # sample
             if schema == "ocsf":
-                self._config.ingestion.data_path = os.path.join(self._root, "data", "sample_ocsf")
+                data_path = os.path.join(self._root, "data", "sample_ocsf")
             else:
-                self._config.ingestion.data_path = os.path.join(self._root, "data", "sample")
+                data_path = os.path.join(self._root, "data", "sample")
 
-        print(f"[DEBUG] data_path => {self._config.ingestion.data_path} (mode={mode}, schema={schema})")
+        # Runs on every load_config() call; only report actual changes
+        if data_path != self._config.ingestion.data_path:
+            self._config.ingestion.data_path = data_path
+            print(f"[DEBUG] data_path => {data_path} (mode={mode}, schema={schema})")
 
     def _apply_env_overrides(self):
         """Override sensitive values from environment variables."""
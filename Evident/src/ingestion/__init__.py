@@ -1,7 +1,11 @@
 """Source manager for orchestrating data ingestion"""
 
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
+from dataclasses import asdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from tqdm import tqdm
+from tqdm.contrib.logging import logging_redirect_tqdm
+import logging
 import os
 from src.ingestion.base_source import BaseSource, SourceMetadata
 from src.ingestion.csv_loaders import (
@@ -13,6 +17,14 @@ from src.schema import SecurityEntity
 from src.ingestion.ocsf_loaders import OCSFJSONLoader
 from src.config import config_loader
 
+logger = logging.getLogger(__name__)
+
+
+def _read_in_process(source: BaseSource, use_frames: bool) -> Tuple[List[Any], SourceMetadata]:
+    """Worker side of load_all(use_processes=True); metadata travels back with the data"""
+    data = source.load_frames() if use_frames else source.load()
+    return data, source.metadata
+
 
 class SourceManager:
     """Manages data ingestion from multiple sources"""
@@ -20,6 +32,14 @@ class SourceManager:
     def __init__(self, data_path: str = "./data"):
         self.data_path = data_path
         self.sources: Dict[str, BaseSource] = {}
+        # (name, source) pairs in registration order, for the iterating paths;
+        # self.sources stays the lookup table for load_source
+        self._sources_seq: Tuple[Tuple[str, BaseSource], ...] = ()
+        
+        # Status/metadata views, rebuilt lazily after sources are registered,
+        # change status, or have their metadata replaced
+        self._views: Optional[Tuple[Dict[str, str], Dict[str, Any], int]] = None
+        self._views_revisions: Tuple[int, ...] = ()
         
         config = config_loader.load_config()
         self.schema_preference = config.ingestion.schema_preference
@@ -38,8 +58,8 @@ class SourceManager:
             signals = ["cves", "assets", "logs", "cloud_configs", "signin_logs", "user_roles", "role_permissions", "detections"]
             for sig in signals:
                 path = f"{self.data_path}/{sig}"
-                if os.path.exists(path) or True: # It may not exist yet, but we define the source
-                    self.register_source(OCSFJSONLoader(path, sig))
+                # It may not exist yet, but we define the source
+                self.register_source(OCSFJSONLoader(path, sig))
         else:
             self.register_source(CVELoader(f"{self.data_path}/cves"))
             self.register_source(AssetLoader(f"{self.data_path}/assets"))
@@ -52,42 +72,116 @@ class SourceManager:
     def register_source(self, source: BaseSource):
         """Register a data source"""
         self.sources[source.source_name] = source
+        self._sources_seq = tuple(self.sources.items())
+        self._views = None
     
-    def load_all(self) -> Dict[str, List[SecurityEntity]]:
+    def load_all(self, use_processes: bool = False) -> Dict[str, List[SecurityEntity]]:
         """
         Load data from all registered sources
         
+        Args:
+            use_processes: Parse sources in worker processes instead of threads.
+                Pays off for large CSVs on multi-core hosts; small sources are
+                faster in threads, which skip process start-up and pickling.
+        
         Returns:
             Dictionary mapping source names to lists of normalized entities
         """
         all_entities = {}
         
-        print("Loading data from all sources...")
-        for source_name, source in tqdm(self.sources.items(), desc="Loading sources"):
+        logger.info("Loading data from all sources...")
+        raw_by_source, load_errors = self._load_raw_parallel(use_processes)
+        
+        # Normalize in registration order: the normalizer's entity counter
+        # feeds entity IDs, so this step stays sequential and deterministic
+        for source_name, source in self._sources_seq:
             try:
-                # Load raw data
-                raw_data = source.load()
+                if source_name in load_errors:
+                    raise load_errors[source_name]
+                
+                raw_data = raw_by_source.get(source_name)
                 
                 if not raw_data:
-                    print(f"  [WARN] No data loaded from {source_name}")
+                    logger.warning("No data loaded from %s", source_name)
                     all_entities[source_name] = []
                     continue
                 
                 # Normalize data
-                entities = self.normalizer.normalize(raw_data, source_name)
+                entities = self._normalize_source(source, raw_data)
                 # Keep entities directly if normalizer bypasses/wraps in OCSFEntity
                 all_entities[source_name] = entities
                 
-                print(f"  [OK] Loaded {len(entities)} entities from {source_name}")
+                logger.info("Loaded %d entities from %s", len(entities), source_name)
                 
             except Exception as e:
-                import traceback
-                traceback.print_exc()
-                print(f"  [ERROR] Error loading {source_name}: {e}")
+                logger.exception("Error loading %s: %s", source_name, e)
                 all_entities[source_name] = []
         
         return all_entities
     
+    def _load_raw_parallel(self, use_processes: bool = False):
+        """
+        Run every source's load() concurrently
+        
+        Sources read disjoint directories, so file IO and CSV parsing overlap
+        in a thread pool (threads keep the per-source metadata updates visible),
+        or in a process pool whose workers send each source's metadata back.
+        Log records emitted while the progress bar is live go through
+        tqdm.write so they don't tear the bar.
+        
+        Returns:
+            Tuple of (raw data by source name, exceptions by source name)
+        """
+        raw_by_source: Dict[str, List[Any]] = {}
+        load_errors: Dict[str, Exception] = {}
+        if not self._sources_seq:
+            return raw_by_source, load_errors
+        
+        max_workers = min(len(self._sources_seq), os.cpu_count() or 1)
+        pool = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        with pool(max_workers=max_workers) as executor, logging_redirect_tqdm():
+            if use_processes:
+                futures = {
+                    executor.submit(_read_in_process, source, self._uses_frames(source)): source_name
+                    for source_name, source in self._sources_seq
+                }
+            else:
+                futures = {
+                    executor.submit(self._read_source, source): source_name
+                    for source_name, source in self._sources_seq
+                }
+            progress = tqdm(as_completed(futures), total=len(futures), desc="Loading sources")
+            for future in progress:
+                source_name = futures[future]
+                progress.set_postfix_str(source_name, refresh=False)
+                try:
+                    if use_processes:
+                        raw_data, metadata = future.result()
+                        # Status changed in the worker's copy of the source
+                        self.sources[source_name].metadata = metadata
+                        self._views = None
+                    else:
+                        raw_data = future.result()
+                    raw_by_source[source_name] = raw_data
+                except Exception as e:
+                    load_errors[source_name] = e
+        
+        return raw_by_source, load_errors
+    
+    def _uses_frames(self, source: BaseSource) -> bool:
+        """True when source and normalizer can exchange DataFrames directly"""
+        return hasattr(source, "load_frames") and hasattr(self.normalizer, "normalize_frames")
+    
+    def _read_source(self, source: BaseSource) -> List[Any]:
+        """Read a source as DataFrames when possible, otherwise as records"""
+        return source.load_frames() if self._uses_frames(source) else source.load()
+    
+    def _normalize_source(self, source: BaseSource, raw_data: List[Any]) -> List[SecurityEntity]:
+        """Normalize whatever _read_source returned for this source"""
+        if self._uses_frames(source):
+            return self.normalizer.normalize_frames(raw_data, source.source_name)
+        return self.normalizer.normalize(raw_data, source.source_name)
+    
     def load_source(self, source_name: str) -> List[SecurityEntity]:
         """
         Load data from a specific source
@@ -102,31 +196,38 @@ class SourceManager:
             raise ValueError(f"Unknown source: {source_name}")
         
         source = self.sources[source_name]
-        raw_data = source.load()
+        raw_data = self._read_source(source)
         
         if not raw_data:
             return []
         
-        entities = self.normalizer.normalize(raw_data, source_name)
+        entities = self._normalize_source(source, raw_data)
         return entities
     
+    def _get_views(self) -> Tuple[Dict[str, str], Dict[str, Any], int]:
+        """Status, metadata and record total, rebuilt only after a change"""
+        revisions = tuple(source.metadata_revision for _, source in self._sources_seq)
+        if self._views is None or revisions != self._views_revisions:
+            status = {}
+            metadata = {}
+            total_records = 0
+            for name, source in self._sources_seq:
+                status[name] = source.metadata.status
+                metadata[name] = asdict(source.get_metadata())
+                total_records += source.metadata.record_count
+            self._views = (status, metadata, total_records)
+            self._views_revisions = revisions
+        return self._views
+    
     def get_metadata(self) -> Dict[str, Any]:
         """Get metadata for all sources"""
-        return {
-            name: source.get_metadata().model_dump()
-            for name, source in self.sources.items()
-        }
+        # Copies, so callers can't alter the cached view; values are scalars
+        return {name: dict(meta) for name, meta in self._get_views()[1].items()}
     
     def get_source_status(self) -> Dict[str, str]:
         """Get status of all sources"""
-        return {
-            name: source.metadata.status
-            for name, source in self.sources.items()
-        }
+        return dict(self._get_views()[0])
     
     def get_total_records(self) -> int:
         """Get total number of records across all sources"""
-        return sum(
-            source.metadata.record_count
-            for source in self.sources.values()
-        )
+        return self._get_views()[2]
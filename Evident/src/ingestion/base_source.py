@@ -1,12 +1,18 @@
 """Base interface for data sources"""
 
+import logging
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List
-from pydantic import BaseModel
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Any, Callable, Iterator, List, Optional
 
+logger = logging.getLogger(__name__)
 
-class SourceMetadata(BaseModel):
-    """Metadata about a data source"""
+
+@dataclass(slots=True)
+class SourceMetadata:
+    """Metadata about a data source (plain mutable holder, no validation)"""
     source_name: str
     source_type: str
     record_count: int = 0
@@ -23,8 +29,10 @@ class BaseSource(ABC):
             source_name=source_name,
             source_type=self.__class__.__name__
         )
+        # Bumped on every status transition; views cached over the metadata
+        # compare it to tell when they are stale
+        self.metadata_revision = 0
     
-    @abstractmethod
     def load(self) -> List[Dict[str, Any]]:
         """
         Load data from the source
@@ -32,8 +40,63 @@ class BaseSource(ABC):
         Returns:
             List of dictionaries containing raw data
         """
+        return self._tracked_load(self._read_records)
+    
+    @abstractmethod
+    def _read_records(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        Read the raw records; load() handles status and metadata
+        
+        Returns:
+            List of raw records, or None if the source location does not exist
+        """
         pass
     
+    def _tracked_load(self, read: Callable[[], Optional[List[Any]]],
+                      count: Callable[[List[Any]], int] = len) -> List[Any]:
+        """Run a read step, keeping metadata status, record count and load time current"""
+        try:
+            with self._load_tracking():
+                data = read()
+                if data is None:
+                    self._set_status("error")
+                    return []
+                self.metadata.record_count = count(data)
+        except Exception as e:
+            logger.exception("Error loading %s data: %s", self.source_name, e)
+            return []
+        return data
+    
+    @contextmanager
+    def _load_tracking(self) -> Iterator[None]:
+        """
+        Status bookkeeping around a read, shared by eager and streaming loads
+        
+        Status is "loading" inside the block and "error" if the block raises
+        or sets it itself (e.g. for a missing source); otherwise "loaded",
+        stamped with the load time. The block sets metadata.record_count.
+        A streaming consumer that stops early (GeneratorExit) leaves the
+        metadata as it was before the load.
+        """
+        previous_status = self.metadata.status
+        self._set_status("loading")
+        try:
+            yield
+        except GeneratorExit:
+            self._set_status(previous_status)
+            raise
+        except Exception:
+            self._set_status("error")
+            raise
+        if self.metadata.status == "loading":
+            self.metadata.last_loaded = datetime.now().isoformat()
+            self._set_status("loaded")
+    
+    def _set_status(self, status: str):
+        """Move metadata to a new load status (set count and load time first)"""
+        self.metadata.status = status
+        self.metadata_revision += 1
+    
     @abstractmethod
     def validate(self, data: Dict[str, Any]) -> bool:
         """
@@ -1,10 +1,105 @@
 """CSV loaders for security data with recursive directory scanning"""
 
 import os
+import logging
 import pandas as pd
-from typing import Dict, Any, List
-from datetime import datetime
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Any, Iterator, List, Optional, Tuple, FrozenSet
 from src.ingestion.base_source import BaseSource
+from src.schema.normalizer import frame_to_records
+
+logger = logging.getLogger(__name__)
+
+
+# pandas dtypes for the type names used in get_schema(). Plain str (object)
+# keeps missing cells as NaN, which the normalizers test for
+_SCHEMA_DTYPES = {"str": str, "float": "float64"}
+
+
+def schema_dtypes(schema: Dict[str, str]) -> Dict[str, Any]:
+    """pd.read_csv dtype mapping for a loader's get_schema() declaration"""
+    return {column: _SCHEMA_DTYPES[kind] for column, kind in schema.items() if kind in _SCHEMA_DTYPES}
+
+
+def _read_csv(csv_file: str, dtype: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+    """Parse one CSV file with the C engine over a memory-mapped file"""
+    # Robust loading: handle diverse encodings and skip bad lines
+    return pd.read_csv(csv_file, encoding='utf-8', on_bad_lines='skip', memory_map=True, dtype=dtype)
+
+
+def _iter_csv_chunks(csv_file: str, dtype: Optional[Dict[str, Any]] = None,
+                     batch_rows: int = 65536) -> Iterator[pd.DataFrame]:
+    """Parse one CSV file lazily, batch_rows rows at a time, with _read_csv's options"""
+    with pd.read_csv(csv_file, encoding='utf-8', on_bad_lines='skip', dtype=dtype,
+                     chunksize=batch_rows) as reader:
+        yield from reader
+
+
+def _parquet_sibling(csv_file: str) -> str:
+    """Path of the .parquet copy that convert_to_parquet writes next to a CSV"""
+    return os.path.splitext(csv_file)[0] + ".parquet"
+
+
+def _read_table(csv_file: str, dtype: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+    """
+    Read a CSV, preferring its .parquet sibling when that is at least as new
+    
+    Parquet needs a pandas parquet engine (pyarrow or fastparquet); without
+    one, or if the sibling is missing, stale or unreadable, the CSV is parsed
+    with the given column dtypes (declared columns skip type inference).
+    Parsed frames are cached until either file changes; treat them as read-only.
+    The single stat of the CSV also keys the cache and short-circuits empty files.
+    """
+    csv_stat = os.stat(csv_file)
+    if csv_stat.st_size == 0:
+        # Nothing to parse (common for live files that are created empty)
+        return pd.DataFrame()
+    parquet_mtime = None
+    try:
+        parquet_stat = os.stat(_parquet_sibling(csv_file))
+        if parquet_stat.st_mtime >= csv_stat.st_mtime:
+            parquet_mtime = parquet_stat.st_mtime_ns
+    except OSError:
+        pass
+    dtype_items = tuple(dtype.items()) if dtype else ()
+    return _read_table_cached(csv_file, csv_stat.st_mtime_ns, csv_stat.st_size, parquet_mtime, dtype_items)
+
+
+@lru_cache(maxsize=32)
+def _read_table_cached(csv_file: str, mtime_ns: int, size: int,
+                       parquet_mtime_ns: Optional[int],
+                       dtype_items: Tuple[Tuple[str, Any], ...]) -> pd.DataFrame:
+    """Parse step of _read_table; the file stamps in the key retire stale entries"""
+    if parquet_mtime_ns is not None:
+        try:
+            return pd.read_parquet(_parquet_sibling(csv_file))
+        except Exception:
+            pass
+    return _read_csv(csv_file, dict(dtype_items) or None)
+
+
+def convert_to_parquet(data_path: str, dtype: Optional[Dict[str, Any]] = None) -> List[str]:
+    """
+    Write a zstd-compressed .parquet sibling for every CSV under data_path
+    
+    The CSV is parsed exactly as the loaders parse it; pass the loader's
+    schema_dtypes() so the Parquet copy yields the same frame. Requires a
+    pandas parquet engine.
+    
+    Returns:
+        Paths of the Parquet files written
+    """
+    written = []
+    for root, _, files in os.walk(data_path):
+        for file in files:
+            if not file.endswith(".csv"):
+                continue
+            csv_file = os.path.join(root, file)
+            parquet_file = _parquet_sibling(csv_file)
+            _read_csv(csv_file, dtype).to_parquet(parquet_file, compression="zstd", index=False)
+            written.append(parquet_file)
+    return written
 
 
 class RecursiveCSVLoader(BaseSource):
@@ -14,181 +109,193 @@ class RecursiveCSVLoader(BaseSource):
         super().__init__(source_name)
         self.data_path = data_path
         
-    def _find_all_csvs(self) -> List[str]:
-        """Find all .csv files in data_path recursively"""
+    def _find_all_csvs(self) -> Optional[List[str]]:
+        """Find all .csv files in data_path recursively, or None if data_path is missing"""
         csv_files = []
-        if not os.path.exists(self.data_path):
-            return []
-            
-        for root, _, files in os.walk(self.data_path):
+        errors = []
+        # os.walk reports an unlistable data_path through onerror, which
+        # saves a separate existence check before the scan
+        for root, _, files in os.walk(self.data_path, onerror=errors.append):
             for file in files:
                 if file.endswith(".csv"):
                     csv_files.append(os.path.join(root, file))
+        if not csv_files and any(e.filename == self.data_path for e in errors):
+            return None
         return csv_files
 
-    def load(self) -> List[Dict[str, Any]]:
-        """Load data from all discovered CSVs"""
-        self.metadata.status = "loading"
+    def _read_records(self) -> Optional[List[Dict[str, Any]]]:
+        """Records from all discovered CSVs"""
+        frames = self._read_frames()
+        if frames is None:
+            return None
         all_data = []
+        for df in frames:
+            all_data.extend(frame_to_records(df))
+        return all_data
+    
+    def iter_records(self, batch_rows: int = 65536) -> Iterator[Dict[str, Any]]:
+        """
+        Stream records from all discovered CSVs, batch_rows rows at a time
         
-        try:
-            csv_files = self._find_all_csvs()
+        Memory stays bounded by one batch regardless of file size, so this
+        bypasses the Parquet copies and the parsed-frame cache used by load().
+        Metadata is finalised once the generator is exhausted.
+        """
+        with self._load_tracking():
+            dtype = schema_dtypes(self.get_schema())
+            record_count = 0
             
-            if not csv_files:
-                # If no files found, check if it's an error or just empty
-                if not os.path.exists(self.data_path):
-                    self.metadata.status = "error"
-                else:
-                    self.metadata.status = "loaded"
-                return []
+            csv_files = self._find_all_csvs()
+            if csv_files is None:
+                self._set_status("error")
+                return
             
             for csv_file in csv_files:
                 try:
-                    # Robust loading: handle diverse encodings and skip bad lines
-                    df = pd.read_csv(csv_file, encoding='utf-8', on_bad_lines='skip')
-                    
-                    # Filter out rows that are entirely empty or purely NaN
-                    df = df.dropna(how='all')
-                    
-                    if not df.empty:
-                        # Use to_dict('records') to get list of dicts
-                        all_data.extend(df.to_dict('records'))
+                    for chunk in _iter_csv_chunks(csv_file, dtype, batch_rows):
+                        chunk = chunk.dropna(how='all')
+                        record_count += len(chunk)
+                        yield from frame_to_records(chunk)
+                except pd.errors.EmptyDataError:
+                    # Header-less empty file (common for live files)
+                    continue
                 except Exception as e:
-                    # Check if file has at least a header (common for empty live files)
-                    try:
-                        with open(csv_file, 'r', encoding='utf-8') as f:
-                            lines = f.readlines()
-                            if len(lines) <= 1: # Only header or empty
-                                continue
-                    except:
-                        pass
-                    print(f"  [ERROR] Failed to read {csv_file}: {e}")
-            
-            self.metadata.record_count = len(all_data)
-            self.metadata.last_loaded = datetime.now().isoformat()
-            self.metadata.status = "loaded"
+                    logger.error("Failed to read %s: %s", csv_file, e)
             
-            return all_data
-        except Exception as e:
-            self.metadata.status = "error"
-            print(f"Error loading {self.source_name} data: {e}")
-            return []
+            self.metadata.record_count = record_count
+    
+    def load_frames(self) -> List[pd.DataFrame]:
+        """Load all discovered CSVs (or their Parquet copies) as one DataFrame per file"""
+        return self._tracked_load(self._read_frames, lambda frames: sum(len(df) for df in frames))
+    
+    def _read_frames(self) -> Optional[List[pd.DataFrame]]:
+        """Non-empty frames of all discovered CSVs, or None if data_path is missing"""
+        csv_files = self._find_all_csvs()
+        if csv_files is None:
+            return None
+        
+        frames = []
+        dtype = schema_dtypes(self.get_schema())
+        for csv_file in csv_files:
+            try:
+                df = _read_table(csv_file, dtype)
+                
+                # Filter out rows that are entirely empty or purely NaN
+                df = df.dropna(how='all')
+                
+                if not df.empty:
+                    frames.append(df)
+            except Exception as e:
+                # Check if file has at least a header (common for empty live files)
+                try:
+                    with open(csv_file, 'r', encoding='utf-8') as f:
+                        lines = f.readlines()
+                        if len(lines) <= 1: # Only header or empty
+                            continue
+                except:
+                    pass
+                logger.error("Failed to read %s: %s", csv_file, e)
+        
+        return frames
 
 
-class CVELoader(RecursiveCSVLoader):
-    """Loader for CVE vulnerability data"""
-    def __init__(self, data_path: str = "./data/cves"):
-        super().__init__("cves", data_path)
+@dataclass(frozen=True)
+class LoaderSpec:
+    """What distinguishes one CSV source from another"""
+    source_name: str
+    required_fields: FrozenSet[str]
+    schema: Dict[str, str]
+
+
+LOADER_SPECS: Dict[str, LoaderSpec] = {spec.source_name: spec for spec in (
+    LoaderSpec("cves",
+               frozenset({"cve_id", "severity", "cvss_score", "description"}),
+               {"cve_id": "str", "severity": "str", "cvss_score": "float",
+                "description": "str", "affected_products": "str",
+                "published_date": "str", "remediation_status": "str"}),
+    LoaderSpec("assets",
+               frozenset({"asset_id", "asset_type", "hostname"}),
+               {"asset_id": "str", "asset_type": "str", "hostname": "str",
+                "ip_address": "str", "os": "str", "owner": "str",
+                "department": "str", "criticality": "str", "last_scan_date": "str"}),
+    LoaderSpec("logs",
+               frozenset({"event_id", "timestamp", "event_type", "severity"}),
+               {"event_id": "str", "timestamp": "str", "source": "str",
+                "event_type": "str", "severity": "str", "user": "str",
+                "asset_id": "str", "description": "str", "raw_log": "str"}),
+    LoaderSpec("cloud_configs",
+               frozenset({"config_id", "cloud_provider", "resource_type"}),
+               {"config_id": "str", "cloud_provider": "str", "resource_type": "str",
+                "resource_id": "str", "setting_name": "str", "setting_value": "str",
+                "compliant": "str", "risk_level": "str"}),
+    LoaderSpec("signin_logs",
+               frozenset({"log_id", "timestamp", "user_id", "username"}),
+               {"log_id": "str", "timestamp": "str", "user_id": "str",
+                "username": "str", "source_ip": "str", "location": "str",
+                "device": "str", "status": "str", "mfa_used": "str", "risk_score": "float"}),
+    LoaderSpec("user_roles",
+               frozenset({"assignment_id", "user_id", "role_id"}),
+               {"assignment_id": "str", "user_id": "str", "username": "str",
+                "role_id": "str", "role_name": "str", "assigned_date": "str",
+                "assigned_by": "str", "expiry_date": "str"}),
+    LoaderSpec("role_permissions",
+               frozenset({"permission_id", "role_id", "resource_type", "action"}),
+               {"permission_id": "str", "role_id": "str", "role_name": "str",
+                "resource_type": "str", "action": "str", "scope": "str",
+                "risk_level": "str"}),
+)}
+
+
+class CSVLoader(RecursiveCSVLoader):
+    """Loader for one CSV source, driven by its LoaderSpec"""
+    spec: Optional[LoaderSpec] = None
+    
+    def __init__(self, data_path: Optional[str] = None, spec: Optional[LoaderSpec] = None):
+        if spec is not None:
+            self.spec = spec
+        if self.spec is None:
+            raise ValueError("CSVLoader needs a LoaderSpec")
+        super().__init__(self.spec.source_name, data_path or f"./data/{self.spec.source_name}")
     
     def validate(self, data: Dict[str, Any]) -> bool:
-        required_fields = ["cve_id", "severity", "cvss_score", "description"]
-        return all(field in data for field in required_fields)
+        return self.spec.required_fields <= data.keys()
     
     def get_schema(self) -> Dict[str, str]:
-        return {
-            "cve_id": "str", "severity": "str", "cvss_score": "float",
-            "description": "str", "affected_products": "str",
-            "published_date": "str", "remediation_status": "str"
-        }
+        # Shared with the spec; callers must not mutate it
+        return self.spec.schema
+
+
+# Named loaders for each built-in source
+class CVELoader(CSVLoader):
+    """Loader for CVE vulnerability data"""
+    spec = LOADER_SPECS["cves"]
 
 
-class AssetLoader(RecursiveCSVLoader):
+class AssetLoader(CSVLoader):
     """Loader for asset inventory data"""
-    def __init__(self, data_path: str = "./data/assets"):
-        super().__init__("assets", data_path)
-    
-    def validate(self, data: Dict[str, Any]) -> bool:
-        required_fields = ["asset_id", "asset_type", "hostname"]
-        return all(field in data for field in required_fields)
-    
-    def get_schema(self) -> Dict[str, str]:
-        return {
-            "asset_id": "str", "asset_type": "str", "hostname": "str",
-            "ip_address": "str", "os": "str", "owner": "str",
-            "department": "str", "criticality": "str", "last_scan_date": "str"
-        }
+    spec = LOADER_SPECS["assets"]
 
 
-class LogEventLoader(RecursiveCSVLoader):
+class LogEventLoader(CSVLoader):
     """Loader for security log events"""
-    def __init__(self, data_path: str = "./data/logs"):
-        super().__init__("logs", data_path)
-    
-    def validate(self, data: Dict[str, Any]) -> bool:
-        required_fields = ["event_id", "timestamp", "event_type", "severity"]
-        return all(field in data for field in required_fields)
-    
-    def get_schema(self) -> Dict[str, str]:
-        return {
-            "event_id": "str", "timestamp": "str", "source": "str",
-            "event_type": "str", "severity": "str", "user": "str",
-            "asset_id": "str", "description": "str", "raw_log": "str"
-        }
+    spec = LOADER_SPECS["logs"]
 
 
-class CloudConfigLoader(RecursiveCSVLoader):
+class CloudConfigLoader(CSVLoader):
     """Loader for cloud configuration data"""
-    def __init__(self, data_path: str = "./data/cloud_configs"):
-        super().__init__("cloud_configs", data_path)
-    
-    def validate(self, data: Dict[str, Any]) -> bool:
-        required_fields = ["config_id", "cloud_provider", "resource_type"]
-        return all(field in data for field in required_fields)
-    
-    def get_schema(self) -> Dict[str, str]:
-        return {
-            "config_id": "str", "cloud_provider": "str", "resource_type": "str",
-            "resource_id": "str", "setting_name": "str", "setting_value": "str",
-            "compliant": "str", "risk_level": "str"
-        }
+    spec = LOADER_SPECS["cloud_configs"]
 
 
-class SignInLogLoader(RecursiveCSVLoader):
+class SignInLogLoader(CSVLoader):
     """Loader for sign-in logs"""
-    def __init__(self, data_path: str = "./data/signin_logs"):
-        super().__init__("signin_logs", data_path)
-    
-    def validate(self, data: Dict[str, Any]) -> bool:
-        required_fields = ["log_id", "timestamp", "user_id", "username"]
-        return all(field in data for field in required_fields)
-    
-    def get_schema(self) -> Dict[str, str]:
-        return {
-            "log_id": "str", "timestamp": "str", "user_id": "str",
-            "username": "str", "source_ip": "str", "location": "str",
-            "device": "str", "status": "str", "mfa_used": "str", "risk_score": "float"
-        }
+    spec = LOADER_SPECS["signin_logs"]
 
 
-class UserRoleLoader(RecursiveCSVLoader):
+class UserRoleLoader(CSVLoader):
     """Loader for user role assignments"""
-    def __init__(self, data_path: str = "./data/user_roles"):
-        super().__init__("user_roles", data_path)
-    
-    def validate(self, data: Dict[str, Any]) -> bool:
-        required_fields = ["assignment_id", "user_id", "role_id"]
-        return all(field in data for field in required_fields)
-    
-    def get_schema(self) -> Dict[str, str]:
-        return {
-            "assignment_id": "str", "user_id": "str", "username": "str",
-            "role_id": "str", "role_name": "str", "assigned_date": "str",
-            "assigned_by": "str", "expiry_date": "str"
-        }
+    spec = LOADER_SPECS["user_roles"]
 
 
-class RolePermissionLoader(RecursiveCSVLoader):
+class RolePermissionLoader(CSVLoader):
     """Loader for role permissions"""
-    def __init__(self, data_path: str = "./data/role_permissions"):
-        super().__init__("role_permissions", data_path)
-    
-    def validate(self, data: Dict[str, Any]) -> bool:
-        required_fields = ["permission_id", "role_id", "resource_type", "action"]
-        return all(field in data for field in required_fields)
-    
-    def get_schema(self) -> Dict[str, str]:
-        return {
-            "permission_id": "str", "role_id": "str", "role_name": "str",
-            "resource_type": "str", "action": "str", "scope": "str",
-            "risk_level": "str"
-        }
+    spec = LOADER_SPECS["role_permissions"]
@@ -1,12 +1,13 @@
 """Loaders for OCSF sample data in JSON format"""
 
 import json
+import logging
 import os
-import glob
-from typing import Dict, Any, List
-from datetime import datetime
+from typing import Dict, Any, List, Optional
 from src.ingestion.base_source import BaseSource
 
+logger = logging.getLogger(__name__)
+
 class OCSFJSONLoader(BaseSource):
     """Loads OCSF structured JSON files from a directory."""
     
@@ -14,21 +15,26 @@ class OCSFJSONLoader(BaseSource):
         super().__init__(source_name)
         self.data_dir = data_dir
         
-    def load(self) -> List[Dict[str, Any]]:
-        self.metadata.status = "loading"
+    def _read_records(self) -> Optional[List[Dict[str, Any]]]:
         all_records = []
         
-        if not os.path.exists(self.data_dir):
-            print(f"  [WARN] OCSF Data directory not found: {self.data_dir}")
-            self.metadata.status = "error"
-            return []
+        # One directory listing serves as both the existence check and the
+        # file discovery (hidden files skipped, as glob does)
+        try:
+            with os.scandir(self.data_dir) as entries:
+                names = [entry.name for entry in entries if not entry.name.startswith(".")]
+        except FileNotFoundError:
+            logger.warning("OCSF Data directory not found: %s", self.data_dir)
+            return None
+        except NotADirectoryError:
+            names = []
             
-        json_files = glob.glob(os.path.join(self.data_dir, "*.json"))
+        json_files = [os.path.join(self.data_dir, name) for name in names if name.endswith(".json")]
         # Also check for ndjson or jsonl if they exist
-        json_files.extend(glob.glob(os.path.join(self.data_dir, "*.jsonl")))
+        json_files.extend(os.path.join(self.data_dir, name) for name in names if name.endswith(".jsonl"))
         
         if not json_files:
-            print(f"  [WARN] No JSON files found in {self.data_dir}")
+            logger.warning("No JSON files found in %s", self.data_dir)
             
         for file_path in json_files:
             try:
@@ -55,11 +61,7 @@ class OCSFJSONLoader(BaseSource):
                             all_records.append(data)
                             
             except Exception as e:
-                print(f"  [ERROR] Failed to load {file_path}: {e}")
-                
-        self.metadata.record_count = len(all_records)
-        self.metadata.last_loaded = datetime.now().isoformat()
-        self.metadata.status = "loaded"
+                logger.error("Failed to load %s: %s", file_path, e)
         
         return all_records
 
@@ -1,11 +1,15 @@
 """LLM factory and prompt templates"""
 
-from typing import Optional
+import sys
+import logging
+from typing import Optional, Tuple
 from src.config import LLMConfig, config_loader
 from src.llm.base_llm import BaseLLM
 from src.llm.gemini_llm import GeminiLLM, GEMINI_AVAILABLE
 from src.llm.mock_llm import MockLLM
 
+logger = logging.getLogger(__name__)
+
 
 class LLMFactory:
     """Factory for creating LLM instances"""
@@ -22,54 +26,51 @@ class LLMFactory:
         Returns:
             BaseLLM instance
         """
-        print(f"\n[DEBUG] LLMFactory.create_llm START (force_mock={force_mock})")
+        logger.debug("LLMFactory.create_llm START (force_mock=%s)", force_mock)
         if config is None:
-            print("[DEBUG] No config provided, loading from config.json...")
+            logger.debug("No config provided, loading from config.json...")
             
             # Smart discovery: Try to find a real provider with a key FIRST
             gemini_cfg = config_loader.get_llm_config(provider="gemini")
             is_mock_env = config_loader.is_mock_mode("llm")
-            print(f"[DEBUG] is_mock_mode (env): {is_mock_env}")
+            logger.debug("is_mock_mode (env): %s", is_mock_env)
             
             # If we have a Gemini key, we should ALWAYS use it (priority 1)
             has_gemini_key = gemini_cfg and gemini_cfg.api_key and "your_gemini_api_key" not in gemini_cfg.api_key
             
             if has_gemini_key:
-                print("[DEBUG] Found valid Gemini configuration. Using as authoritative source.")
+                logger.debug("Found valid Gemini configuration. Using as authoritative source.")
                 config = gemini_cfg
             elif force_mock:
-                print("[DEBUG] Forced Mock mode active (No real keys found)")
+                logger.debug("Forced Mock mode active (No real keys found)")
                 config = config_loader.get_llm_config(provider="mock")
             elif is_mock_env:
-                print("[DEBUG] Environment requested Mock mode, no real keys found. Using Mock.")
+                logger.debug("Environment requested Mock mode, no real keys found. Using Mock.")
                 config = config_loader.get_llm_config(provider="mock")
             else:
-                print("[DEBUG] Defaulting to Gemini search")
+                logger.debug("Defaulting to Gemini search")
                 config = gemini_cfg or config_loader.get_llm_config()
         
-        print(f"[DEBUG] Resolved Config - Name: {config.name}, Provider: {config.provider}, Model: {config.model_id}")
+        logger.debug("Resolved Config - Name: %s, Provider: %s, Model: %s", config.name, config.provider, config.model_id)
         
         if force_mock or config.provider == "mock":
-            print("[DEBUG] Creating MockLLM instance")
+            logger.debug("Creating MockLLM instance")
             return MockLLM(config)
         
         if config.provider == "gemini":
-            print("[DEBUG] Attempting GeminiLLM initialization...")
+            logger.debug("Attempting GeminiLLM initialization...")
             if not GEMINI_AVAILABLE:
-                print("[DEBUG] GEMINI_AVAILABLE is False (import error)")
+                logger.debug("GEMINI_AVAILABLE is False (import error)")
                 mock_config = config_loader.get_llm_config(provider="mock")
                 mock = MockLLM(mock_config)
                 mock.fallback_reason = "google-genai package not installed or import failed."
                 return mock
             try:
                 llm = GeminiLLM(config)
-                print("[DEBUG] GeminiLLM initialized successfully")
+                logger.debug("GeminiLLM initialized successfully")
                 return llm
             except Exception as e:
-                import traceback
-                error_detail = traceback.format_exc()
-                print(f"[DEBUG] GeminiLLM INIT FAILED: {e}")
-                print(f"[DEBUG] Traceback: {error_detail}")
+                logger.warning("GeminiLLM INIT FAILED: %s", e, exc_info=True)
                 
                 mock_config = config_loader.get_llm_config(provider="mock")
                 mock = MockLLM(mock_config)
@@ -85,7 +86,7 @@ class LLMFactory:
                 from src.llm.claude_llm import ClaudeLLM
                 return ClaudeLLM(config)
         except Exception as e:
-            print(f"⚠️ Failed to initialize {config.provider}: {e}")
+            logger.warning("Failed to initialize %s: %s", config.provider, e)
             mock_config = config_loader.get_llm_config(provider="mock")
             mock = MockLLM(mock_config)
             mock.fallback_reason = f"{config.provider.title()} initialization failed: {str(e)}"
@@ -94,6 +95,13 @@ class LLMFactory:
         raise ValueError(f"Unsupported LLM provider: {config.provider}")
 
 
+def _split_template(template: str) -> Tuple[str, str, str]:
+    """Split a template into the literal text around its {context} and {query} fields"""
+    prefix, rest = template.split("{context}")
+    middle, suffix = rest.split("{query}")
+    return prefix, middle, suffix
+
+
 class PromptTemplates:
     """Security-specific prompt templates"""
     
@@ -112,6 +120,7 @@ Always provide:
 4. Actionable next steps
 
 Be direct and professional. If you don't have enough information, say so clearly."""
+    SYSTEM_PROMPT = sys.intern(SYSTEM_PROMPT)
     
     INVESTIGATION_PROMPT = """You are Evident, a cybersecurity AI specialized in threat intelligence.
 Use the following context from our Security Intelligence Graph and Vector Database to answer the investigator's question.
@@ -158,6 +167,13 @@ Assess:
 
 Assessment:"""
     
+    # Templates pre-split so build_prompt only concatenates
+    _TEMPLATE_PARTS = {
+        "investigation": _split_template(INVESTIGATION_PROMPT),
+        "threat": _split_template(THREAT_ANALYSIS_PROMPT),
+        "compliance": _split_template(COMPLIANCE_PROMPT),
+    }
+    
     @staticmethod
     def build_prompt(query: str, context: str, prompt_type: str = "investigation") -> str:
         """
@@ -171,11 +187,6 @@ Assessment:"""
         Returns:
             Formatted prompt
         """
-        templates = {
-            "investigation": PromptTemplates.INVESTIGATION_PROMPT,
-            "threat": PromptTemplates.THREAT_ANALYSIS_PROMPT,
-            "compliance": PromptTemplates.COMPLIANCE_PROMPT,
-        }
-        
-        template = templates.get(prompt_type, PromptTemplates.INVESTIGATION_PROMPT)
-        return template.format(context=context, query=query)
+        parts = PromptTemplates._TEMPLATE_PARTS
+        prefix, middle, suffix = parts.get(prompt_type) or parts["investigation"]
+        return "".join((prefix, context, middle, query, suffix))
@@ -3,6 +3,8 @@
 from abc import ABC, abstractmethod
 from typing import Dict, Any, List, Optional
 
+import numpy as np
+
 
 class BaseLLM(ABC):
     """Abstract base class for all LLM providers"""
@@ -32,7 +34,7 @@ class BaseLLM(ABC):
         pass
     
     @abstractmethod
-    def embed(self, text: str) -> List[float]:
+    def embed(self, text: str) -> np.ndarray:
         """
         Generate embeddings for text
         
@@ -40,10 +42,25 @@ class BaseLLM(ABC):
             text: Text to embed
         
         Returns:
-            List of embedding values
+            1-D float32 array of embedding values
         """
         pass
     
+    def embed_batch(self, texts: List[str]) -> List[np.ndarray]:
+        """
+        Generate embeddings for several texts
+        
+        Providers with a batched embedding endpoint should override this;
+        the default embeds one text at a time.
+        
+        Args:
+            texts: Texts to embed
+        
+        Returns:
+            One float32 embedding array per text, in input order
+        """
+        return [self.embed(text) for text in texts]
+    
     def get_stats(self) -> Dict[str, Any]:
         """Get usage statistics"""
         return {
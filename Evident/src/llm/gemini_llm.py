@@ -1,7 +1,13 @@
 """Google Gemini LLM implementation (uses google-genai SDK)"""
 
 import os
-from typing import Dict, Any, List
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+import numpy as np
 
 try:
     import google.genai as genai
@@ -19,15 +25,54 @@ except ImportError:
 
 from src.llm.base_llm import BaseLLM
 
+logger = logging.getLogger(__name__)
+
+EMBED_MODEL = "models/text-embedding-004"
+EMBED_DIMENSIONS = 768
+# The embed_content endpoint accepts at most 100 texts per request
+EMBED_BATCH_SIZE = 100
+EMBED_CACHE_SIZE = 4096
+PROMPT_TOKEN_CACHE_SIZE = 1024
+# google.genai clients kept for reuse, one per API key
+CLIENT_CACHE_SIZE = 8
+
+# Shared across GeminiLLM instances (every agent rebuild creates one); usage
+# stats and the resolved model stay per instance
+_client_cache: "OrderedDict[bytes, Any]" = OrderedDict()
+_client_cache_lock = threading.Lock()
+
+
+def _content_key(text: str) -> bytes:
+    """Content-hash cache key for a text (embeddings, prompt token counts)"""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def _shared_client(api_key: str) -> Any:
+    """google.genai Client for api_key, created on first use and reused afterwards"""
+    key = _content_key(api_key)
+    with _client_cache_lock:
+        client = _client_cache.get(key)
+        if client is not None:
+            _client_cache.move_to_end(key)
+            return client
+        client = genai.Client(
+            api_key=api_key,
+            http_options=genai_types.HttpOptions(api_version='v1')
+        )
+        _client_cache[key] = client
+        if len(_client_cache) > CLIENT_CACHE_SIZE:
+            _client_cache.popitem(last=False)
+        return client
+
 
 class GeminiLLM(BaseLLM):
     """Google Gemini LLM implementation"""
 
     def __init__(self, config: Any):
         super().__init__(config)
-        print(f"[DEBUG] GeminiLLM.__init__ START")
+        logger.debug("GeminiLLM.__init__ START")
         if not GEMINI_AVAILABLE:
-            print("[DEBUG] Gemini SDK not available, raising ImportError")
+            logger.debug("Gemini SDK not available, raising ImportError")
             raise ImportError(
                 "google-genai package not installed. "
                 "Install with: pip install google-genai"
@@ -40,30 +85,31 @@ class GeminiLLM(BaseLLM):
             source = "environment"
             
         if not api_key or api_key == "your_gemini_api_key_here":
-            print(f"[DEBUG] Gemini API key invalid or missing (Source: {source})")
+            logger.debug("Gemini API key invalid or missing (Source: %s)", source)
             raise ValueError(
                 f"Gemini API key not found or placeholder used (Source: {source}). "
                 "Set GEMINI_API_KEY environment variable or provide in config."
             )
 
+        # Embeddings keyed by content hash, least recently used evicted first
+        self._embed_cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        # Server-side prompt token counts, only used when a response lacks usage metadata
+        self._prompt_token_cache: Dict[bytes, int] = {}
+
         masked_key = f"{api_key[:6]}...{api_key[-4:]}" if len(api_key) > 10 else "***"
-        print(f"[DEBUG] Using API Key from {source}: {masked_key}")
+        logger.debug("Using API Key from %s: %s", source, masked_key)
 
-        # Initialize Client with stable v1 API version
-        print("[DEBUG] Initializing google.genai Client (API Version: v1)...")
-        from google.genai import types as genai_types
-        self.client = genai.Client(
-            api_key=api_key,
-            http_options=genai_types.HttpOptions(api_version='v1')
-        )
+        # Client with stable v1 API version, shared by instances using this key
+        logger.debug("Initializing google.genai Client (API Version: v1)...")
+        self.client = _shared_client(api_key)
 
         # Use base model name (SDK often adds models/ itself or fails if double-prefixed)
         self.model_id = config.model_id
         if self.model_id.startswith("models/"):
-            print(f"[DEBUG] Sanitizing model_id: {self.model_id}")
+            logger.debug("Sanitizing model_id: %s", self.model_id)
             self.model_id = self.model_id.replace("models/", "")
         
-        print(f"✅ [DEBUG] GeminiLLM instance created. Model: {self.model_id}")
+        logger.debug("GeminiLLM instance created. Model: %s", self.model_id)
 
     def generate(self, prompt: str, context: str = "", **kwargs) -> Dict[str, Any]:
         """Generate response using Gemini"""
@@ -81,7 +127,7 @@ class GeminiLLM(BaseLLM):
 
             response_text = response.text
 
-            tokens_used = self._estimate_tokens(full_prompt, response_text)
+            tokens_used = self._count_tokens(full_prompt, response, response_text)
             cost = tokens_used * self.config.cost_per_token
 
             self.total_tokens += tokens_used
@@ -96,19 +142,19 @@ class GeminiLLM(BaseLLM):
 
         except Exception as e:
             error_str = str(e).lower()
-            print(f"[DEBUG] Gemini Generation Error: {e}")
+            logger.warning("Gemini Generation Error: %s", e)
             
             # Automatic fallback if 404 or unsupported model occurs
             if "not found" in error_str or "404" in error_str or "not_found" in error_str or "not supported" in error_str:
-                print(f"⚠️ Model {self.model_id} hit 404 or is unsupported. Attempting dynamic discovery...")
+                logger.warning("Model %s hit 404 or is unsupported. Attempting dynamic discovery...", self.model_id)
                 
                 try:
                     # 1. Discover actual available models for this key
                     available_models = []
-                    print("[DEBUG] Querying all available models from API...")
+                    logger.debug("Querying all available models from API...")
                     for m in self.client.models.list():
                         methods = getattr(m, 'supported_methods', [])
-                        print(f"[DEBUG] Model found: {m.name} | Methods: {methods}")
+                        logger.debug("Model found: %s | Methods: %s", m.name, methods)
                         
                         # Be lenient: Include if metadata is empty or explicitly supports generation
                         name = m.name.replace('models/', '')
@@ -133,7 +179,7 @@ class GeminiLLM(BaseLLM):
                             new_model = target
                             break
                     
-                    print(f"🔄 Switching to discovered model: {new_model}")
+                    logger.info("🔄 Switching to discovered model: %s", new_model)
                     self.model_id = new_model
                     
                     # 3. Retry with discovery model
@@ -147,7 +193,7 @@ class GeminiLLM(BaseLLM):
                     )
                     
                     response_text = response.text
-                    tokens_used = self._estimate_tokens(full_prompt, response_text)
+                    tokens_used = self._count_tokens(full_prompt, response, response_text)
                     cost = tokens_used * self.config.cost_per_token
                     
                     return {
@@ -158,7 +204,7 @@ class GeminiLLM(BaseLLM):
                     }
 
                 except Exception as discovery_err:
-                    print(f"❌ Dynamic discovery failed: {discovery_err}")
+                    logger.error("Dynamic discovery failed: %s", discovery_err)
                     return {
                         "text": f"Critical Error: Model {self.model_id} failed and no suitable fallback found. {str(discovery_err)}",
                         "model": self.model_id,
@@ -175,17 +221,55 @@ class GeminiLLM(BaseLLM):
                 "error": str(e),
             }
 
-    def embed(self, text: str) -> List[float]:
+    def embed(self, text: str) -> np.ndarray:
         """Generate embeddings using Gemini"""
-        try:
-            response = self.client.models.embed_content(
-                model="models/text-embedding-004",
-                contents=text,
-            )
-            return response.embeddings[0].values
-        except Exception as e:
-            print(f"Error generating embedding: {e}")
-            return [0.0] * 768
+        return self.embed_batch([text])[0]
+
+    def embed_batch(self, texts: List[str]) -> List[np.ndarray]:
+        """Generate embeddings using Gemini, one request per EMBED_BATCH_SIZE uncached texts"""
+        cache = self._embed_cache
+        keys = [_content_key(text) for text in texts]
+
+        # Unique texts not embedded yet, in first-seen order
+        misses: Dict[bytes, str] = {}
+        for key, text in zip(keys, texts):
+            if key in cache:
+                cache.move_to_end(key)
+            elif key not in misses:
+                misses[key] = text
+
+        results = {}
+        miss_keys = list(misses)
+        for start in range(0, len(miss_keys), EMBED_BATCH_SIZE):
+            batch = miss_keys[start:start + EMBED_BATCH_SIZE]
+            try:
+                response = self.client.models.embed_content(
+                    model=EMBED_MODEL,
+                    contents=[misses[key] for key in batch],
+                )
+                for key, embedding in zip(batch, response.embeddings):
+                    vector = np.asarray(embedding.values, dtype=np.float32)
+                    # Cached arrays are shared between callers
+                    vector.flags.writeable = False
+                    results[key] = vector
+            except Exception as e:
+                # Failed texts get zero vectors and are not cached
+                logger.warning("Error generating embedding: %s", e)
+
+        for key, values in results.items():
+            cache[key] = values
+        while len(cache) > EMBED_CACHE_SIZE:
+            cache.popitem(last=False)
+
+        vectors = []
+        for key in keys:
+            vector = results.get(key)
+            if vector is None:
+                vector = cache.get(key)
+            if vector is None:
+                vector = np.zeros(EMBED_DIMENSIONS, dtype=np.float32)
+            vectors.append(vector)
+        return vectors
 
     def _build_prompt(self, prompt: str, context: str) -> str:
         """The agent now builds the full prompt using PromptTemplates.
@@ -194,6 +278,35 @@ class GeminiLLM(BaseLLM):
             return prompt
         return f"{prompt}\n\n[Additional Retrieved Context]\n{context}"
 
+    def _count_tokens(self, prompt: str, response: Any, response_text: str) -> int:
+        """Tokens billed for a generate_content call"""
+        # Recent API versions report exact usage with the response
+        usage = getattr(response, "usage_metadata", None)
+        total = getattr(usage, "total_token_count", None)
+        if total:
+            return total
+        
+        prompt_tokens = self._prompt_tokens(prompt)
+        if prompt_tokens is None:
+            return self._estimate_tokens(prompt, response_text)
+        return prompt_tokens + self._estimate_tokens("", response_text)
+
+    def _prompt_tokens(self, prompt: str) -> Optional[int]:
+        """Exact prompt token count from count_tokens, cached by prompt hash (None on failure)"""
+        key = _content_key(prompt)
+        cached = self._prompt_token_cache.get(key)
+        if cached is not None:
+            return cached
+        try:
+            count = self.client.models.count_tokens(model=self.model_id, contents=prompt).total_tokens
+        except Exception as e:
+            logger.debug("count_tokens failed, estimating instead: %s", e)
+            return None
+        if len(self._prompt_token_cache) >= PROMPT_TOKEN_CACHE_SIZE:
+            self._prompt_token_cache.clear()
+        self._prompt_token_cache[key] = count
+        return count
+
     def _estimate_tokens(self, prompt: str, response: str) -> int:
         """Estimate token count (rough approximation: ~4 chars per token)"""
         return (len(prompt) + len(response)) // 4
@@ -2,87 +2,37 @@
 
 import time
 import random
+import hashlib
 from typing import Dict, Any, List
+
+import numpy as np
 from src.llm.base_llm import BaseLLM
 
+MOCK_EMBED_DIMENSIONS = 384
+# splitmix64 state for (text, dimension): a content hash of the text plus the
+# golden-ratio increment times the dimension index
+_DIM_INCREMENTS = np.arange(1, MOCK_EMBED_DIMENSIONS + 1, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
 
-class MockLLM(BaseLLM):
-    """Mock LLM for testing and development"""
-    
-    def __init__(self, config: Any):
-        super().__init__(config)
-        self.response_templates = self._load_templates()
-        self.fallback_reason = None # Explicit reason why we are in mock mode
-    
-    def generate(self, prompt: str, context: str = "", **kwargs) -> Dict[str, Any]:
-        """Generate mock security response"""
-        
-        # Simulate latency
-        time.sleep(random.uniform(0.5, 1.5))
-        
-        # Analyze prompt to generate relevant response
-        response_text = self._generate_response(prompt, context)
-        
-        # Add fallback disclaimer if reason exists
-        if self.fallback_reason:
-            disclaimer = f"⚠️ **REAL LLM UNAVAILABLE**: {self.fallback_reason}\n"
-            disclaimer += "*Providing reasoning via MockLLM using retrieved security context.*\n\n"
-            response_text = disclaimer + response_text
 
-        # Estimate tokens
-        tokens_used = (len(prompt) + len(context) + len(response_text)) // 4
-        cost = tokens_used * self.config.cost_per_token
-        
-        self.total_tokens += tokens_used
-        self.total_cost += cost
-        
-        return {
-            "text": response_text,
-            "model": self.config.model_id,
-            "tokens_used": tokens_used,
-            "cost": cost
-        }
-    
-    def embed(self, text: str) -> List[float]:
-        """Generate mock embeddings (random vector)"""
-        # Return consistent random vector based on text hash
-        random.seed(hash(text) % (2**32))
-        return [random.random() for _ in range(384)]
-    
-    def _generate_response(self, prompt: str, context: str) -> str:
-        """Generate contextual mock response"""
-        prompt_lower = prompt.lower()
-        
-        # Vulnerability queries
-        if any(word in prompt_lower for word in ["cve", "vulnerability", "vulnerabilities", "affected"]):
-            return self._vulnerability_response(prompt, context)
-        
-        # Asset queries
-        elif any(word in prompt_lower for word in ["asset", "server", "device", "infrastructure"]):
-            return self._asset_response(prompt, context)
-        
-        # Access/Permission queries
-        elif any(word in prompt_lower for word in ["permission", "access", "role", "privilege"]):
-            return self._access_response(prompt, context)
-        
-        # Event/Log queries
-        elif any(word in prompt_lower for word in ["event", "log", "failed", "login", "attempt"]):
-            return self._event_response(prompt, context)
-        
-        # Cloud security queries
-        elif any(word in prompt_lower for word in ["cloud", "aws", "azure", "gcp", "misconfiguration"]):
-            return self._cloud_response(prompt, context)
-        
-        # General security query
-        else:
-            return self._general_response(prompt, context)
-    
-    def _vulnerability_response(self, prompt: str, context: str) -> str:
-        if context and "No relevant context found" not in context:
-            return f"""Based on the security data analysis:
+def _mock_embeddings(texts: List[str]) -> np.ndarray:
+    """Deterministic [0, 1) float32 vectors per text, computed for all texts at once"""
+    # blake2b rather than hash(), which is salted per process
+    seeds = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(t.encode(), digest_size=8).digest(), "little") for t in texts),
+        dtype=np.uint64, count=len(texts)
+    )
+    z = seeds[:, None] + _DIM_INCREMENTS
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    z ^= z >> np.uint64(31)
+    # Top 24 bits -> exact float32 in [0, 1)
+    return (z >> np.uint64(40)).astype(np.float32) * np.float32(1.0 / (1 << 24))
+
+# Response bodies for the keyword routes; each takes the leading slice of context
+_VULNERABILITY_TEMPLATE = """Based on the security data analysis:
 
 **Security Context Summary:**
-{context[:400]}...
+%s...
 
 **Critical Findings:**
 - Potential vulnerabilities detected in the identified assets/CVEs.
@@ -93,14 +43,10 @@ class MockLLM(BaseLLM):
 1. Patch affected assets according to the context provided.
 2. Verify isolation of mission-critical systems.
 3. Review associated security logs for indicators of compromise."""
-        
-        return "I found several vulnerabilities in the system. Please provide more specific criteria (like a CVE ID or asset name) to narrow down the search."
-    
-    def _asset_response(self, prompt: str, context: str) -> str:
-        if context:
-            return f"""**Asset Analysis:**
 
-{context[:400]}...
+_ASSET_TEMPLATE = """**Asset Analysis:**
+
+%s...
 
 **Summary:**
 - Assets have been categorized by type and criticality
@@ -114,14 +60,10 @@ class MockLLM(BaseLLM):
 
 **Recommendations:**
 Maintain up-to-date asset inventory and ensure regular security scans."""
-        
-        return "Asset information is available. Please specify which assets you'd like to investigate."
-    
-    def _access_response(self, prompt: str, context: str) -> str:
-        if context:
-            return f"""**Access Control Analysis:**
 
-{context[:400]}...
+_ACCESS_TEMPLATE = """**Access Control Analysis:**
+
+%s...
 
 **Findings:**
 - User role assignments and permissions have been mapped
@@ -137,14 +79,10 @@ Maintain up-to-date asset inventory and ensure regular security scans."""
 1. Audit high-risk permissions quarterly
 2. Implement just-in-time access for critical operations
 3. Enable MFA for all privileged accounts"""
-        
-        return "Access control data is available. Please specify the user or role you want to investigate."
-    
-    def _event_response(self, prompt: str, context: str) -> str:
-        if context:
-            return f"""**Security Event Analysis:**
 
-{context[:400]}...
+_EVENT_TEMPLATE = """**Security Event Analysis:**
+
+%s...
 
 **Event Summary:**
 - Multiple security events detected across different severity levels
@@ -161,14 +99,10 @@ Maintain up-to-date asset inventory and ensure regular security scans."""
 2. Correlate events with user behavior baselines
 3. Block suspicious IP addresses
 4. Enable enhanced logging for affected assets"""
-        
-        return "Security events are being monitored. Please specify the time range or event type you're interested in."
-    
-    def _cloud_response(self, prompt: str, context: str) -> str:
-        if context:
-            return f"""**Cloud Security Assessment:**
 
-{context[:400]}...
+_CLOUD_TEMPLATE = """**Cloud Security Assessment:**
+
+%s...
 
 **Configuration Issues:**
 - Several misconfigurations detected across cloud providers
@@ -185,16 +119,12 @@ Maintain up-to-date asset inventory and ensure regular security scans."""
 2. Enable encryption at rest and in transit
 3. Implement least-privilege IAM policies
 4. Enable cloud security monitoring and alerting"""
-        
-        return "Cloud configuration data is available. Please specify which cloud provider or resource type to analyze."
-    
-    def _general_response(self, prompt: str, context: str) -> str:
-        if context:
-            return f"""**Security Intelligence Summary:**
+
+_GENERAL_TEMPLATE = """**Security Intelligence Summary:**
 
 Based on the available security data:
 
-{context[:300]}...
+%s...
 
 **Analysis:**
 The security posture shows a mix of strengths and areas requiring attention. Multiple data sources have been correlated to provide comprehensive insights.
@@ -206,6 +136,117 @@ The security posture shows a mix of strengths and areas requiring attention. Mul
 4. Review and update security policies regularly
 
 Please ask more specific questions about vulnerabilities, assets, access controls, events, or cloud security for detailed analysis."""
+
+
+class MockLLM(BaseLLM):
+    """Mock LLM for testing and development"""
+    
+    # (keywords, response method) in priority order: the first category with
+    # any keyword in the prompt wins, otherwise _general_response answers
+    _RESPONSE_ROUTES = (
+        # Vulnerability queries
+        (("cve", "vulnerability", "vulnerabilities", "affected"), "_vulnerability_response"),
+        # Asset queries
+        (("asset", "server", "device", "infrastructure"), "_asset_response"),
+        # Access/Permission queries
+        (("permission", "access", "role", "privilege"), "_access_response"),
+        # Event/Log queries
+        (("event", "log", "failed", "login", "attempt"), "_event_response"),
+        # Cloud security queries
+        (("cloud", "aws", "azure", "gcp", "misconfiguration"), "_cloud_response"),
+    )
+    
+    def __init__(self, config: Any):
+        super().__init__(config)
+        self.response_templates = self._load_templates()
+        self.fallback_reason = None # Explicit reason why we are in mock mode
+    
+    def generate(self, prompt: str, context: str = "", **kwargs) -> Dict[str, Any]:
+        """Generate mock security response"""
+        
+        # Simulate latency only when configured, so tests and benchmarks run at full speed
+        if getattr(self.config, "simulate_latency", False):
+            time.sleep(random.uniform(*self.config.latency_range))
+        
+        # Analyze prompt to generate relevant response
+        response_text = self._generate_response(prompt, context)
+        
+        # Add fallback disclaimer if reason exists
+        if self.fallback_reason:
+            disclaimer = f"⚠️ **REAL LLM UNAVAILABLE**: {self.fallback_reason}\n"
+            disclaimer += "*Providing reasoning via MockLLM using retrieved security context.*\n\n"
+            response_text = disclaimer + response_text
+
+        # Estimate tokens
+        tokens_used = (len(prompt) + len(context) + len(response_text)) // 4
+        cost = tokens_used * self.config.cost_per_token
+        
+        self.total_tokens += tokens_used
+        self.total_cost += cost
+        
+        return {
+            "text": response_text,
+            "model": self.config.model_id,
+            "tokens_used": tokens_used,
+            "cost": cost
+        }
+    
+    def embed(self, text: str) -> np.ndarray:
+        """Generate mock embeddings (random vector)"""
+        # Pseudo-random vector derived from the text, stable across runs
+        return _mock_embeddings([text])[0]
+    
+    def embed_batch(self, texts: List[str]) -> List[np.ndarray]:
+        """Mock embeddings for many texts in one vectorized pass"""
+        return list(_mock_embeddings(texts))
+    
+    def _generate_response(self, prompt: str, context: str) -> str:
+        """Generate contextual mock response"""
+        prompt_lower = prompt.lower()
+        
+        # Plain substring tests run in C; one loop over the precomputed
+        # routes beats a regex alternation scan for these few keywords
+        for keywords, handler in self._RESPONSE_ROUTES:
+            for word in keywords:
+                if word in prompt_lower:
+                    return getattr(self, handler)(prompt, context)
+        
+        # General security query
+        return self._general_response(prompt, context)
+    
+    def _vulnerability_response(self, prompt: str, context: str) -> str:
+        if context and "No relevant context found" not in context:
+            return _VULNERABILITY_TEMPLATE % context[:400]
+        
+        return "I found several vulnerabilities in the system. Please provide more specific criteria (like a CVE ID or asset name) to narrow down the search."
+    
+    def _asset_response(self, prompt: str, context: str) -> str:
+        if context:
+            return _ASSET_TEMPLATE % context[:400]
+        
+        return "Asset information is available. Please specify which assets you'd like to investigate."
+    
+    def _access_response(self, prompt: str, context: str) -> str:
+        if context:
+            return _ACCESS_TEMPLATE % context[:400]
+        
+        return "Access control data is available. Please specify the user or role you want to investigate."
+    
+    def _event_response(self, prompt: str, context: str) -> str:
+        if context:
+            return _EVENT_TEMPLATE % context[:400]
+        
+        return "Security events are being monitored. Please specify the time range or event type you're interested in."
+    
+    def _cloud_response(self, prompt: str, context: str) -> str:
+        if context:
+            return _CLOUD_TEMPLATE % context[:400]
+        
+        return "Cloud configuration data is available. Please specify which cloud provider or resource type to analyze."
+    
+    def _general_response(self, prompt: str, context: str) -> str:
+        if context:
+            return _GENERAL_TEMPLATE % context[:300]
         
         return """I'm Evident, your security intelligence assistant. I can help you investigate:
 
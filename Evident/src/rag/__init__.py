@@ -1,11 +1,16 @@
 """RAG engine for context retrieval and augmentation"""
 
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import List, Dict, Any, Optional, Iterable
 from src.rag.vector_store import VectorStore
 from src.rag.embedder import SecurityDocumentEmbedder
 from src.schema import SecurityEntity
 from src.config import config_loader
 
+# Entities converted to documents and added to the vector store per round trip
+INDEX_BATCH_SIZE = 256
+
 
 class RAGEngine:
     """Retrieval-Augmented Generation engine"""
@@ -18,7 +23,10 @@ class RAGEngine:
         if vector_store is None:
             self.vector_store = VectorStore(
                 persist_directory=cfg.vector_db.path,
-                collection_name=cfg.vector_db.collection_name
+                collection_name=cfg.vector_db.collection_name,
+                embedding_backend=cfg.vector_db.embedding_backend,
+                embedding_model_file=cfg.vector_db.embedding_model_file,
+                embedding_device=cfg.vector_db.embedding_device
             )
         else:
             self.vector_store = vector_store
@@ -34,26 +42,47 @@ class RAGEngine:
         self.top_k = cfg.agent.retrieval_top_k
         self.max_context_length = cfg.agent.max_context_length
     
-    def index_entities(self, entities: List[SecurityEntity]):
+    def index_entities(self, entities: Iterable[SecurityEntity], batch_size: int = INDEX_BATCH_SIZE):
         """
         Index security entities into vector store
         
+        Entities are consumed in batches, so at most two batches of document
+        text and metadata are held at a time; any iterable works. A single
+        background thread formats the next batch while the vector store
+        encodes the current one (the encoder releases the GIL), and keeps
+        the embedder's document IDs in order.
+        
         Args:
-            entities: List of SecurityEntity objects to index
+            entities: SecurityEntity objects to index (list or iterator)
+            batch_size: Entities converted and added per vector store call
         """
-        if not entities:
+        print("Indexing entities...")
+        
+        iterator = iter(entities)
+        indexed = 0
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            pending = None
+            while True:
+                batch = list(islice(iterator, batch_size))
+                
+                # Convert entities to documents
+                converted = executor.submit(self.embedder.embed_entities, batch) if batch else None
+                
+                # Add the previous batch to the vector store meanwhile
+                if pending is not None:
+                    documents, metadatas, ids = pending.result()
+                    self.vector_store.add_documents(documents, metadatas, ids)
+                
+                if converted is None:
+                    break
+                pending = converted
+                indexed += len(batch)
+        
+        if not indexed:
             print("[WARN] No entities to index")
             return
         
-        print(f"Indexing {len(entities)} entities...")
-        
-        # Convert entities to documents
-        documents, metadatas, ids = self.embedder.embed_entities(entities)
-        
-        # Add to vector store
-        self.vector_store.add_documents(documents, metadatas, ids)
-        
-        print(f"[OK] Indexed {len(entities)} entities")
+        print(f"[OK] Indexed {indexed} entities")
     
     def retrieve_context(self, query: str, top_k: Optional[int] = None, 
                         filter_by: Optional[Dict[str, Any]] = None) -> str:
@@ -77,8 +106,8 @@ class RAGEngine:
         if not results:
             return "No relevant security data found."
         
-        # Format context
-        context = self._format_context(results)
+        # Format context, stopping once the blocks already exceed the cap
+        context = self._format_context(results, self.max_context_length)
         
         # Truncate if too long
         if len(context) > self.max_context_length:
@@ -102,24 +131,26 @@ class RAGEngine:
         
         return self.vector_store.search(query, top_k=top_k)
     
-    def _format_context(self, results: List[Dict[str, Any]]) -> str:
-        """Format search results into context string"""
-        context_parts = []
+    def _format_context(self, results: List[Dict[str, Any]], max_length: Optional[int] = None) -> str:
+        """
+        Format search results into context string
         
+        With max_length, results after the first block that takes the text
+        past max_length are not formatted; the caller still truncates.
+        """
+        # One block per result: source header, document, then an empty line
+        # for separation (the join supplies the blank line between blocks)
+        blocks = []
+        length = -1  # the join adds one separator per block after the first
         for i, result in enumerate(results, 1):
-            doc = result['document']
             metadata = result['metadata']
-            distance = result.get('distance', 0.0)
-            
-            # Add source information
-            source = metadata.get('source', 'unknown')
-            entity_type = metadata.get('entity_type', 'unknown')
-            
-            context_parts.append(f"[Source {i}: {entity_type} from {source}]")
-            context_parts.append(doc)
-            context_parts.append("")  # Empty line for separation
-        
-        return "\n".join(context_parts)
+            block = (f"[Source {i}: {metadata.get('entity_type', 'unknown')} "
+                     f"from {metadata.get('source', 'unknown')}]\n{result['document']}\n")
+            blocks.append(block)
+            length += len(block) + 1
+            if max_length is not None and length > max_length:
+                break
+        return "\n".join(blocks)
     
     def clear_index(self):
         """Clear all indexed documents"""
@@ -1,14 +1,42 @@
 """Document embedder for security data"""
 
+import sys
+import hashlib
 from typing import List, Dict, Any
-from src.schema import SecurityEntity, EntityType
+from src.schema import (
+    SecurityEntity, Vulnerability, Asset, User, Role, Permission,
+    SecurityEvent, CloudResource, SignInLog
+)
+
+
+def _intern(value):
+    """Intern low-cardinality metadata strings so every dict shares one copy"""
+    return sys.intern(value) if type(value) is str else value
 
 
 class SecurityDocumentEmbedder:
     """Converts security entities into embeddable documents"""
     
     def __init__(self):
-        self.doc_count = 0
+        # Exact entity class -> converter; one dict lookup per entity instead
+        # of an entity_type comparison chain plus hasattr probes
+        self._doc_handlers = {
+            Vulnerability: self._vulnerability_to_doc,
+            Asset: self._asset_to_doc,
+            SecurityEvent: self._event_to_doc,
+            SignInLog: self._signin_to_doc,
+            CloudResource: self._cloud_to_doc,
+            User: self._user_to_doc,
+            Role: self._role_to_doc,
+            Permission: self._permission_to_doc,
+        }
+        self._metadata_handlers = {
+            Vulnerability: self._vulnerability_metadata,
+            Asset: self._asset_metadata,
+            SecurityEvent: self._event_metadata,
+            SignInLog: self._signin_metadata,
+            CloudResource: self._cloud_metadata,
+        }
     
     def embed_entities(self, entities: List[SecurityEntity]) -> tuple[List[str], List[Dict[str, Any]], List[str]]:
         """
@@ -20,40 +48,23 @@ class SecurityDocumentEmbedder:
         Returns:
             Tuple of (documents, metadatas, ids)
         """
-        documents = []
-        metadatas = []
-        ids = []
+        to_document = self._entity_to_document
+        to_metadata = self._entity_to_metadata
+        documents = [to_document(entity) for entity in entities]
+        metadatas = [to_metadata(entity) for entity in entities]
         
-        for entity in entities:
-            doc_text = self._entity_to_document(entity)
-            metadata = self._entity_to_metadata(entity)
-            doc_id = self._generate_id(entity)
-            
-            documents.append(doc_text)
-            metadatas.append(metadata)
-            ids.append(doc_id)
+        generate_id = self._generate_id
+        ids = [generate_id(entity, document) for entity, document in zip(entities, documents)]
         
         return documents, metadatas, ids
     
     def _entity_to_document(self, entity: SecurityEntity) -> str:
         """Convert entity to searchable document text"""
         
-        if entity.entity_type == EntityType.VULNERABILITY:
-            return self._vulnerability_to_doc(entity)
-        elif entity.entity_type == EntityType.ASSET:
-            return self._asset_to_doc(entity)
-        elif entity.entity_type == EntityType.EVENT:
-            return self._event_to_doc(entity)
-        elif entity.entity_type == EntityType.CLOUD_RESOURCE:
-            return self._cloud_to_doc(entity)
-        elif entity.entity_type == EntityType.USER:
-            return self._user_to_doc(entity)
-        elif entity.entity_type == EntityType.ROLE:
-            return self._role_to_doc(entity)
-        elif entity.entity_type == EntityType.PERMISSION:
-            return self._permission_to_doc(entity)
-        else:
-            return f"{entity.entity_type}: {entity.id}"
+        handler = self._doc_handlers.get(type(entity))
+        if handler is not None:
+            return handler(entity)
+        return f"{entity.entity_type}: {entity.id}"
     
     def _vulnerability_to_doc(self, vuln) -> str:
         """Convert vulnerability to document"""
@@ -75,13 +86,10 @@ Department: {asset.department or 'N/A'}
 Criticality: {asset.criticality}
 Last Scan: {asset.last_scan_date}"""
     
-    def _event_to_doc(self, event) -> str:
-        """Convert security event to document"""
-        # Check if it's a SignInLog or SecurityEvent
-        if hasattr(event, 'log_id'):
-            # SignInLog
-            mfa_status = "MFA enabled" if event.mfa_used else "No MFA"
-            return f"""Sign-In Event {event.log_id}: {event.username}
+    def _signin_to_doc(self, event) -> str:
+        """Convert sign-in log to document"""
+        mfa_status = "MFA enabled" if event.mfa_used else "No MFA"
+        return f"""Sign-In Event {event.log_id}: {event.username}
 User ID: {event.user_id}
 Source IP: {event.source_ip}
 Location: {event.location or 'N/A'}
@@ -90,9 +98,10 @@ Status: {event.status}
 {mfa_status}
 Risk Score: {event.risk_score}
 Timestamp: {event.timestamp}"""
-        else:
-            # SecurityEvent
-            return f"""Security Event {event.event_id}: {event.description}
+    
+    def _event_to_doc(self, event) -> str:
+        """Convert security event to document"""
+        return f"""Security Event {event.event_id}: {event.description}
 Type: {event.event_type}
 Severity: {event.severity.value}
 Source: {event.source}
@@ -141,36 +150,40 @@ Risk Level: {perm.risk_level}"""
         metadata = {
             "entity_type": entity.entity_type.value,
             "entity_id": entity.id,
-            "source": entity.metadata.get("source", "unknown")
+            "source": _intern(entity.metadata.get("source", "unknown"))
         }
         
         # Add type-specific metadata
-        if entity.entity_type == EntityType.VULNERABILITY:
-            metadata["severity"] = entity.severity.value
-            metadata["cvss_score"] = entity.cvss_score
-            metadata["cve_id"] = entity.cve_id
-        elif entity.entity_type == EntityType.ASSET:
-            metadata["criticality"] = entity.criticality
-            metadata["asset_type"] = entity.asset_type
-        elif entity.entity_type == EntityType.EVENT:
-            # Check if it's a SignInLog or SecurityEvent
-            if hasattr(entity, 'log_id'):
-                # SignInLog
-                metadata["event_type"] = "signin"
-                metadata["status"] = entity.status
-                metadata["risk_score"] = entity.risk_score
-            else:
-                # SecurityEvent
-                metadata["severity"] = entity.severity.value
-                metadata["event_type"] = entity.event_type
-        elif entity.entity_type == EntityType.CLOUD_RESOURCE:
-            metadata["cloud_provider"] = entity.cloud_provider
-            metadata["compliant"] = str(entity.compliant)
-            metadata["risk_level"] = entity.risk_level
+        handler = self._metadata_handlers.get(type(entity))
+        if handler is not None:
+            handler(entity, metadata)
         
         return metadata
     
-    def _generate_id(self, entity: SecurityEntity) -> str:
-        """Generate unique ID for document"""
-        self.doc_count += 1
-        return f"{entity.entity_type.value}_{entity.id}_{self.doc_count}"
+    def _vulnerability_metadata(self, vuln, metadata: Dict[str, Any]):
+        metadata["severity"] = vuln.severity.value
+        metadata["cvss_score"] = vuln.cvss_score
+        metadata["cve_id"] = vuln.cve_id
+    
+    def _asset_metadata(self, asset, metadata: Dict[str, Any]):
+        metadata["criticality"] = _intern(asset.criticality)
+        metadata["asset_type"] = _intern(asset.asset_type)
+    
+    def _signin_metadata(self, signin, metadata: Dict[str, Any]):
+        metadata["event_type"] = "signin"
+        metadata["status"] = _intern(signin.status)
+        metadata["risk_score"] = signin.risk_score
+    
+    def _event_metadata(self, event, metadata: Dict[str, Any]):
+        metadata["severity"] = event.severity.value
+        metadata["event_type"] = _intern(event.event_type)
+    
+    def _cloud_metadata(self, cloud, metadata: Dict[str, Any]):
+        metadata["cloud_provider"] = _intern(cloud.cloud_provider)
+        metadata["compliant"] = str(cloud.compliant)
+        metadata["risk_level"] = _intern(cloud.risk_level)
+    
+    def _generate_id(self, entity: SecurityEntity, document: str) -> str:
+        """Generate document ID; stable for unchanged content so re-indexing can skip it"""
+        digest = hashlib.blake2b(document.encode(), digest_size=8).hexdigest()
+        return f"{entity.entity_type.value}_{entity.id}_{digest}"
@@ -2,17 +2,40 @@
 
 import os
 import sys
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
+
+# Sentences per forward pass; matches the RAG engine's indexing batch so each
+# add_documents call encodes in a single pass (the library default is 32)
+ENCODE_BATCH_SIZE = 256
+# Sentences per forward pass when encoding on a GPU
+GPU_ENCODE_BATCH_SIZE = 512
+# Documents encoded and written per collection.add, bounding peak memory
+ADD_BATCH_SIZE = 2048
+# Distinct query strings whose embeddings are kept per store
+QUERY_CACHE_SIZE = 2048
 
 class VectorStore:
     """ChromaDB-based vector store for security documents"""
     
-    def __init__(self, persist_directory: str = "./chroma_db", collection_name: str = "evident_security"):
+    def __init__(self, persist_directory: str = "./chroma_db", collection_name: str = "evident_security",
+                 embedding_backend: str = "torch", embedding_model_file: Optional[str] = None,
+                 embedding_device: str = "cpu"):
         self.persist_directory = persist_directory
         self.collection_name = collection_name
+        self.embedding_backend = embedding_backend
+        self.embedding_model_file = embedding_model_file
+        self.embedding_device = embedding_device
+        self.encode_batch_size = ENCODE_BATCH_SIZE
         self.client = None
         self.collection = None
         self.embedding_model = None
+        # Repeated queries (agent retries, eval harnesses) skip the forward pass
+        self._encode_query = lru_cache(maxsize=QUERY_CACHE_SIZE)(self._encode_query_uncached)
+        # Whether collection.add takes the encoder's ndarray as is; None until
+        # the first add (chromadb 0.4 only accepts nested lists)
+        self._numpy_embeddings: Optional[bool] = None
         
         # Lazy load chromadb to avoid startup hangs
         try:
@@ -48,6 +71,38 @@ class VectorStore:
         """Lazy load sentence-transformers and torch"""
         try:
             from sentence_transformers import SentenceTransformer
+            
+            if self.embedding_backend != "torch":
+                # ONNX Runtime / OpenVINO run the same model with fused (and
+                # optionally int8) kernels; fall back to torch if unavailable
+                try:
+                    model_kwargs = {"file_name": self.embedding_model_file} if self.embedding_model_file else None
+                    self.embedding_model = SentenceTransformer(
+                        'all-MiniLM-L6-v2', device='cpu',
+                        backend=self.embedding_backend, model_kwargs=model_kwargs
+                    )
+                    print(f"[OK] Loaded embedding model: all-MiniLM-L6-v2 ({self.embedding_backend})")
+                    return
+                except Exception as e:
+                    print(f"[WARN] {self.embedding_backend} embedding backend unavailable ({e}), using torch")
+            
+            if self.embedding_device != "cpu":
+                # Opt-in accelerator: half-precision weights on CUDA; fall back
+                # to the CPU path below on any failure
+                try:
+                    import torch
+                    if self.embedding_device.startswith("cuda") and not torch.cuda.is_available():
+                        raise RuntimeError("CUDA is not available")
+                    model = SentenceTransformer('all-MiniLM-L6-v2', device=self.embedding_device)
+                    if self.embedding_device.startswith("cuda"):
+                        model.half()
+                    self.embedding_model = model
+                    self.encode_batch_size = GPU_ENCODE_BATCH_SIZE
+                    print(f"[OK] Loaded embedding model: all-MiniLM-L6-v2 ({self.embedding_device})")
+                    return
+                except Exception as e:
+                    print(f"[WARN] Could not use {self.embedding_device} for embeddings ({e}), using cpu")
+            
             # Explicitly use 'cpu' device to avoid PyTorch meta-tensor errors or hangs on CUDA
             try:
                 self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2', device='cpu')
@@ -69,19 +124,77 @@ class VectorStore:
         if not documents:
             return
         
-        # Generate embeddings
-        embeddings = self.embedding_model.encode(documents).tolist()
+        # IDs hash the document text, so an ID already in the collection (or
+        # repeated in this call) is content that needs no new embedding
+        existing = self._existing_ids(ids)
+        if existing or len(set(ids)) < len(ids):
+            keep = []
+            for i, doc_id in enumerate(ids):
+                if doc_id not in existing:
+                    existing.add(doc_id)
+                    keep.append(i)
+            skipped = len(ids) - len(keep)
+            documents = [documents[i] for i in keep]
+            metadatas = [metadatas[i] for i in keep]
+            ids = [ids[i] for i in keep]
+            print(f"[OK] Skipping {skipped} unchanged documents")
+            if not documents:
+                return
         
-        # Add to collection
-        self.collection.add(
-            documents=documents,
-            embeddings=embeddings,
-            metadatas=metadatas,
-            ids=ids
-        )
+        # Encode and write in ADD_BATCH_SIZE slices; one writer thread adds
+        # slice k to the collection while slice k+1 is encoded
+        with ThreadPoolExecutor(max_workers=1) as writer:
+            pending = None
+            for start in range(0, len(documents), ADD_BATCH_SIZE):
+                end = start + ADD_BATCH_SIZE
+                
+                # Generate embeddings
+                embeddings = self.embedding_model.encode(
+                    documents[start:end],
+                    batch_size=self.encode_batch_size,
+                    convert_to_numpy=True,
+                    show_progress_bar=False,
+                ).astype("float32", copy=False)  # fp16 models return float16
+                
+                if pending is not None:
+                    pending.result()
+                pending = writer.submit(
+                    self._add_to_collection,
+                    documents[start:end], embeddings, metadatas[start:end], ids[start:end]
+                )
+            pending.result()
         
         print(f"[OK] Added {len(documents)} documents to vector store")
     
+    def _existing_ids(self, ids: List[str]) -> set:
+        """Subset of ids already stored in the collection"""
+        try:
+            return set(self.collection.get(ids=ids, include=[])["ids"])
+        except Exception as e:
+            print(f"[WARN] Could not check existing documents ({e}), re-encoding all")
+            return set()
+    
+    def _add_to_collection(self, documents: List[str], embeddings: Any,
+                           metadatas: List[Dict[str, Any]], ids: List[str]):
+        """One collection.add of pre-computed embeddings"""
+        # Hand over the float32 array without boxing every value when the
+        # installed chromadb accepts it
+        if self._numpy_embeddings is not False:
+            try:
+                self.collection.add(documents=documents, embeddings=embeddings, metadatas=metadatas, ids=ids)
+                self._numpy_embeddings = True
+            except ValueError:
+                if self._numpy_embeddings:
+                    raise
+                self._numpy_embeddings = False
+        if self._numpy_embeddings is False:
+            self.collection.add(
+                documents=documents,
+                embeddings=embeddings.tolist(),
+                metadatas=metadatas,
+                ids=ids
+            )
+    
     def search(self, query: str, top_k: int = 5, filter_metadata: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """Search for similar documents"""
         if not self.collection or not self.embedding_model:
@@ -89,7 +202,7 @@ class VectorStore:
             return []
             
         # Generate query embedding
-        query_embedding = self.embedding_model.encode([query])[0].tolist()
+        query_embedding = list(self._encode_query(query))
         
         # Search
         results = self.collection.query(
@@ -111,6 +224,14 @@ class VectorStore:
         
         return formatted_results
     
+    def encode_query(self, query: str) -> Tuple[float, ...]:
+        """Embedding of a query, from the same cache search() encodes through"""
+        return self._encode_query(query)
+    
+    def _encode_query_uncached(self, query: str) -> Tuple[float, ...]:
+        """Embedding of one query string, as an immutable tuple for caching"""
+        return tuple(self.embedding_model.encode([query])[0].tolist())
+    
     def clear(self):
         """Clear all documents from the collection"""
         if not self.client: return
@@ -2,26 +2,144 @@
 
 from typing import Dict, Any, List, Union, Optional
 from datetime import datetime
+from functools import lru_cache
+from itertools import groupby
+import numpy as np
+import pandas as pd
 from src.schema import (
     SecurityEntity, Vulnerability, Asset, User, Role, Permission,
     SecurityEvent, CloudResource, SignInLog, EntityType, Severity
 )
 from src.schema.ocsf_schema import OCSFEntity
 
+# Formats tried, in order, when parsing flat-schema dates
+DATE_FORMATS = ["%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S"]
+
+# Distinct date strings whose parse result is kept (log timestamps repeat)
+PARSE_DATE_CACHE_SIZE = 65536
+
+# Severity labels for CVEs; anything else is MEDIUM
+CVE_SEVERITY_MAP = {
+    "critical": Severity.CRITICAL,
+    "high": Severity.HIGH,
+    "medium": Severity.MEDIUM,
+    "low": Severity.LOW,
+}
+
+# Severity labels for log events; anything else is INFO
+EVENT_SEVERITY_MAP = {**CVE_SEVERITY_MAP, "info": Severity.INFO}
+
+# Lower-cased flag values read as True (compliant, mfa_used)
+TRUTHY_VALUES = frozenset({"true", "yes", "1"})
+
+# Flag columns that normalize_frames coerces to bool column-wise
+FLAG_COLUMNS = {
+    "cloud_configs": ["compliant"],
+    "signin_logs": ["mfa_used"],
+}
+
+# Frames shorter than this skip the column-wise passes of normalize_frames;
+# their fixed pandas overhead outweighs per-row parsing (live connector
+# folders hold thousands of one-row CSVs)
+COLUMNWISE_MIN_ROWS = 1000
+
+# Date columns that normalize_frames parses column-wise, per source type
+DATE_COLUMNS = {
+    "cves": ["published_date"],
+    "assets": ["last_scan_date"],
+    "logs": ["timestamp"],
+    "signin_logs": ["timestamp"],
+    "user_roles": ["assigned_date"],
+}
+
+
+def _is_truthy(value: Any) -> bool:
+    """Flag cell as bool; values already coerced by normalize_frames pass through"""
+    if type(value) is bool:
+        return value
+    return str(value).lower() in TRUTHY_VALUES
+
+
+def _frame_layout(df: pd.DataFrame) -> tuple:
+    """Column names and dtypes; frames sharing one concatenate without changing any value"""
+    return tuple(zip(df.columns, df.dtypes))
+
+
+def concat_frame_runs(frames: List[pd.DataFrame]) -> List[pd.DataFrame]:
+    """
+    Join consecutive frames with the same layout into one, keeping row order
+    
+    Frames whose columns or dtypes differ stay apart, so no missing column
+    is filled with NaN and no dtype is widened.
+    """
+    runs = []
+    for _, run in groupby(frames, key=_frame_layout):
+        run = list(run)
+        runs.append(run[0] if len(run) == 1 else pd.concat(run, ignore_index=True))
+    return runs
+
+
+def small_frame_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    Row dicts for a short DataFrame, same values as frame_to_records
+    
+    One object-array conversion for the whole frame; frame_to_records
+    builds a Series per column, which dominates for one-row frames.
+    """
+    columns = df.columns.tolist()
+    return [dict(zip(columns, row)) for row in df.to_numpy(dtype=object).tolist()]
+
+
+def frame_to_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    Row dicts for a DataFrame, same values as df.to_dict('records')
+    
+    Each column is converted to Python objects once with Series.tolist()
+    and rows are zipped back together, instead of boxing cell by cell.
+    """
+    columns = df.columns.tolist()
+    return [dict(zip(columns, row)) for row in zip(*(series.tolist() for _, series in df.items()))]
+
+
+@lru_cache(maxsize=PARSE_DATE_CACHE_SIZE)
+def _parse_date_text(text: str) -> Optional[datetime]:
+    """Parse a date string with DATE_FORMATS, or None if none matches"""
+    # datetime.fromisoformat is a C fast path; only used for exactly the
+    # shapes of DATE_FORMATS so it accepts nothing strptime would reject
+    n = len(text)
+    if (n == 10 or (n == 19 and text[10] in " T" and text[13] == ":" and text[16] == ":")) \
+            and text[4] == "-" and text[7] == "-":
+        try:
+            return datetime.fromisoformat(text)
+        except ValueError:
+            pass
+    
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    return None
+
 
 class SecurityNormalizer:
     """Normalizes raw security data into unified schema"""
     
     def __init__(self):
         self.entity_count = 0
+        # Ingest time stamped on rows without a date of their own
+        self._batch_now: Optional[datetime] = None
     
-    def normalize(self, raw_data: Dict[str, Any], source_type: str) -> List[SecurityEntity]:
+    def normalize(self, raw_data: Dict[str, Any], source_type: str,
+                  ingest_ts: Optional[datetime] = None) -> List[SecurityEntity]:
         """
         Normalize raw data based on source type
         
         Args:
             raw_data: Raw data dictionary or list
             source_type: Type of source (cves, assets, logs, etc.)
+            ingest_ts: Timestamp for undated rows (cloud configs, role
+                permissions); defaults to the time of this call
         
         Returns:
             List of normalized SecurityEntity objects
@@ -40,32 +158,100 @@ class SecurityNormalizer:
         if not normalizer:
             raise ValueError(f"Unknown source type: {source_type}")
         
-        # Handle both single dict and list of dicts
-        if isinstance(raw_data, list):
-            entities = []
-            for item in raw_data:
-                entity = normalizer(item)
-                if entity:
-                    entities.extend(entity if isinstance(entity, list) else [entity])
-            return entities
-        else:
-            result = normalizer(raw_data)
-            return result if isinstance(result, list) else [result]
+        # Only for the duration of this batch; direct row calls use now()
+        self._batch_now = ingest_ts or datetime.now()
+        try:
+            # Handle both single dict and list of dicts
+            if isinstance(raw_data, list):
+                entities = []
+                for item in raw_data:
+                    entity = normalizer(item)
+                    if entity:
+                        entities.extend(entity if isinstance(entity, list) else [entity])
+                return entities
+            else:
+                result = normalizer(raw_data)
+                return result if isinstance(result, list) else [result]
+        finally:
+            self._batch_now = None
+    
+    def normalize_frames(self, frames: List[pd.DataFrame], source_type: str,
+                         ingest_ts: Optional[datetime] = None) -> List[SecurityEntity]:
+        """
+        Normalize CSV data handed over as DataFrames
+        
+        For frames of at least COLUMNWISE_MIN_ROWS rows (consecutive ones
+        of the same layout concatenated first), date columns are parsed and
+        flag columns lower-cased and matched a whole column at a time with
+        pandas; the row normalizers then see datetime/None and bool values
+        and skip their own parsing. Shorter frames go through normalize()
+        row by row. Numeric columns already arrive as float64 from the
+        loader's dtypes. Output is identical to normalize() on the same
+        records, in frame order.
+        
+        Args:
+            frames: DataFrames as returned by RecursiveCSVLoader.load_frames
+            source_type: Type of source (cves, assets, logs, etc.)
+            ingest_ts: Timestamp for undated rows, shared by all frames
+        
+        Returns:
+            List of normalized SecurityEntity objects
+        """
+        ingest_ts = ingest_ts or datetime.now()
+        entities = []
+        for columnwise, group in groupby(frames, key=lambda df: len(df) >= COLUMNWISE_MIN_ROWS):
+            if not columnwise:
+                records = [record for frame in group for record in small_frame_records(frame)]
+                entities.extend(self.normalize(records, source_type, ingest_ts))
+                continue
+            
+            for frame in concat_frame_runs(list(group)):
+                parsed = {
+                    column: self._parse_date_column(frame[column])
+                    for column in DATE_COLUMNS.get(source_type, [])
+                    if column in frame.columns
+                }
+                for column in FLAG_COLUMNS.get(source_type, []):
+                    if column in frame.columns:
+                        parsed[column] = self._flag_column(frame[column])
+                if parsed:
+                    frame = frame.assign(**parsed)
+                entities.extend(self.normalize(frame_to_records(frame), source_type, ingest_ts))
+        return entities
+    
+    def _flag_column(self, column: pd.Series) -> pd.Series:
+        """Vectorized _is_truthy over a column; each distinct value is tested once"""
+        codes, uniques = pd.factorize(column, use_na_sentinel=False)
+        truthy = np.array([str(value).lower() in TRUTHY_VALUES for value in uniques], dtype=bool)
+        return pd.Series(truthy[codes], index=column.index)
+    
+    def _parse_date_column(self, column: pd.Series) -> pd.Series:
+        """Vectorized _parse_date over a column, returning datetime/None objects"""
+        result = pd.Series([None] * len(column), index=column.index, dtype=object)
+        remaining = column[column.notna() & column.astype(bool)].astype(str)
+        
+        for fmt in DATE_FORMATS:
+            if remaining.empty:
+                break
+            parsed = pd.to_datetime(remaining, format=fmt, errors="coerce")
+            matched = parsed.notna()
+            result[matched[matched].index] = [ts.to_pydatetime() for ts in parsed[matched]]
+            remaining = remaining[~matched]
+        
+        # Leftovers include years outside the datetime64 range; let the
+        # scalar parser have the final word so results match exactly
+        for idx in remaining.index:
+            result[idx] = self._parse_date(column[idx])
+        return result
     
     def _normalize_cve(self, data: Dict[str, Any]) -> Vulnerability:
         """Normalize CVE data"""
         self.entity_count += 1
         
         # Parse severity
-        severity_map = {
-            "critical": Severity.CRITICAL,
-            "high": Severity.HIGH,
-            "medium": Severity.MEDIUM,
-            "low": Severity.LOW,
-        }
         val = data.get("severity", "")
         raw_sev = str(val).lower() if val is not None and not (isinstance(val, float) and val != val) else ""
-        severity = severity_map.get(raw_sev, Severity.MEDIUM)
+        severity = CVE_SEVERITY_MAP.get(raw_sev, Severity.MEDIUM)
         
         # Parse date
         published_date = self._parse_date(data.get("published_date"))
@@ -108,16 +294,9 @@ class SecurityNormalizer:
         """Normalize log event data"""
         self.entity_count += 1
         
-        severity_map = {
-            "critical": Severity.CRITICAL,
-            "high": Severity.HIGH,
-            "medium": Severity.MEDIUM,
-            "low": Severity.LOW,
-            "info": Severity.INFO,
-        }
         val = data.get("severity", "")
         raw_sev = str(val).lower() if val is not None and not (isinstance(val, float) and val != val) else ""
-        severity = severity_map.get(raw_sev, Severity.INFO)
+        severity = EVENT_SEVERITY_MAP.get(raw_sev, Severity.INFO)
         
         event_time = self._parse_date(data.get("timestamp"))
         
@@ -139,7 +318,7 @@ class SecurityNormalizer:
         """Normalize cloud configuration data"""
         self.entity_count += 1
         
-        compliant = str(data.get("compliant", "true")).lower() in ["true", "yes", "1"]
+        compliant = _is_truthy(data.get("compliant", "true"))
         
         return CloudResource(
             id=f"cloud_{self.entity_count}",
@@ -150,7 +329,7 @@ class SecurityNormalizer:
             setting_value=data.get("setting_value", ""),
             compliant=compliant,
             risk_level=str(data.get("risk_level", "low")).lower() if data.get("risk_level") is not None and not (isinstance(data.get("risk_level"), float) and data.get("risk_level") != data.get("risk_level")) else "low",
-            timestamp=datetime.now(),
+            timestamp=self._batch_now or datetime.now(),
             metadata={"source": "cloud_configs", "config_id": data.get("config_id")}
         )
     
@@ -159,7 +338,7 @@ class SecurityNormalizer:
         self.entity_count += 1
         
         signin_time = self._parse_date(data.get("timestamp"))
-        mfa_used = str(data.get("mfa_used", "false")).lower() in ["true", "yes", "1"]
+        mfa_used = _is_truthy(data.get("mfa_used", "false"))
         
         return SignInLog(
             id=f"signin_{self.entity_count}",
@@ -216,7 +395,7 @@ class SecurityNormalizer:
             action=data.get("action", ""),
             scope=data.get("scope", ""),
             risk_level=str(data.get("risk_level", "medium")).lower() if data.get("risk_level") is not None and not (isinstance(data.get("risk_level"), float) and data.get("risk_level") != data.get("risk_level")) else "medium",
-            timestamp=datetime.now(),
+            timestamp=self._batch_now or datetime.now(),
             metadata={"source": "role_permissions", "role_name": data.get("role_name")}
         )
     
@@ -229,13 +408,7 @@ class SecurityNormalizer:
             return date_str
         
         try:
-            # Try common date formats
-            for fmt in ["%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S"]:
-                try:
-                    return datetime.strptime(str(date_str), fmt)
-                except ValueError:
-                    continue
-            return None
+            return _parse_date_text(str(date_str))
         except:
             return None
     
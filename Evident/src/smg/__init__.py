@@ -4,7 +4,6 @@ from typing import Dict, Any, List, Optional
 from src.schema import SecurityEntity
 from src.smg.node_builder import SecurityNodeBuilder
 from src.smg.relationship_builder import SecurityRelationshipBuilder
-from src.smg.neo4j_store import Neo4jGraphStore
 from src.smg.mock_store import MockGraphStore
 from src.config import config_loader
 
@@ -22,6 +21,8 @@ class SMGManager:
             print("[OK] Using mock graph store")
         else:
             try:
+                # neo4j driver is only imported when a real graph store is requested
+                from src.smg.neo4j_store import Neo4jGraphStore
                 self.graph_store = Neo4jGraphStore()
                 print("[OK] Using Neo4j graph store")
             except Exception as e:
@@ -38,6 +39,21 @@ class SMGManager:
         else:
             self.node_builder = SecurityNodeBuilder()
             self.relationship_builder = SecurityRelationshipBuilder()
+        
+        self._query_dispatch = self._build_query_dispatch()
+    
+    def _build_query_dispatch(self) -> Dict[str, tuple]:
+        """
+        query_type -> (store method, accepted params with their defaults);
+        other params are ignored, as tool calls may pass extras
+        """
+        return {
+            "nodes": (self.graph_store.query_nodes, {"label": None, "properties": None}),
+            "relationships": (self.graph_store.query_relationships,
+                              {"rel_type": None, "from_id": None, "to_id": None}),
+            "neighbors": (self.graph_store.get_neighbors, {"node_id": None, "rel_type": None}),
+            "path": (self.graph_store.find_path, {"from_id": None, "to_id": None, "max_depth": 3}),
+        }
     
     def build_graph(self, entities: List[SecurityEntity]):
         """
@@ -72,33 +88,12 @@ class SMGManager:
         Returns:
             Query results
         """
-        if query_type == "nodes":
-            return self.graph_store.query_nodes(
-                label=params.get("label"),
-                properties=params.get("properties")
-            )
-        
-        elif query_type == "relationships":
-            return self.graph_store.query_relationships(
-                rel_type=params.get("rel_type"),
-                from_id=params.get("from_id"),
-                to_id=params.get("to_id")
-            )
-        
-        elif query_type == "neighbors":
-            return self.graph_store.get_neighbors(
-                node_id=params.get("node_id"),
-                rel_type=params.get("rel_type")
-            )
-        
-        elif query_type == "path":
-            return self.graph_store.find_path(
-                from_id=params.get("from_id"),
-                to_id=params.get("to_id"),
-                max_depth=params.get("max_depth", 3)
-            )
+        entry = self._query_dispatch.get(query_type)
+        if entry is None:
+            return []
         
-        return []
+        method, accepted = entry
+        return method(**{name: params.get(name, default) for name, default in accepted.items()})
     
     def get_assets_affected_by_cve(self, cve_id: str) -> List[Dict[str, Any]]:
         """Get all assets affected by a specific CVE"""
@@ -120,13 +115,7 @@ class SMGManager:
         )
         
         # Get affected assets
-        assets = []
-        for rel in affects_rels:
-            asset_id = rel['to_id']
-            if asset_id in self.graph_store.node_index:
-                assets.append(self.graph_store.node_index[asset_id])
-        
-        return assets
+        return self._endpoint_nodes(affects_rels, 'to_id')
     
     def get_user_permissions(self, username: str) -> List[Dict[str, Any]]:
         """Get all permissions for a user"""
@@ -155,11 +144,7 @@ class SMGManager:
                 rel_type="HAS_PERMISSION",
                 from_id=role_id
             )
-            
-            for perm_rel in perm_rels:
-                perm_id = perm_rel['to_id']
-                if perm_id in self.graph_store.node_index:
-                    permissions.append(self.graph_store.node_index[perm_id])
+            permissions.extend(self._endpoint_nodes(perm_rels, 'to_id'))
         
         return permissions
     
@@ -183,30 +168,28 @@ class SMGManager:
         )
         
         # Get assets
-        assets = []
-        for rel in owns_rels:
-            asset_id = rel['to_id']
-            if asset_id in self.graph_store.node_index:
-                assets.append(self.graph_store.node_index[asset_id])
-        
-        return assets
+        return self._endpoint_nodes(owns_rels, 'to_id')
     
     def get_events_for_asset(self, asset_id: str) -> List[Dict[str, Any]]:
         """Get all events involving an asset"""
-        events = []
-        
         # Find INVOLVES relationships pointing to this asset
         involves_rels = self.graph_store.query_relationships(
             rel_type="INVOLVES",
             to_id=asset_id
         )
         
-        for rel in involves_rels:
-            event_id = rel['from_id']
-            if event_id in self.graph_store.node_index:
-                events.append(self.graph_store.node_index[event_id])
-        
-        return events
+        return self._endpoint_nodes(involves_rels, 'from_id')
+    
+    def _endpoint_nodes(self, rels: List[Dict[str, Any]], end: str) -> List[Dict[str, Any]]:
+        """Stored nodes at one end ('from_id' or 'to_id') of each relationship, skipping missing ones"""
+        lookup = self.graph_store.node_index.get
+        nodes = []
+        for rel in rels:
+            # One probe per edge instead of a membership test plus an index
+            node = lookup(rel[end])
+            if node is not None:
+                nodes.append(node)
+        return nodes
 
     def get_signals_of_interest(self, limit: int = 5) -> List[Dict[str, Any]]:
         """Returns a list of high-risk entities or suspicious paths for the agent to investigate."""
@@ -251,6 +234,8 @@ class SMGManager:
         else:
             self.node_builder = SecurityNodeBuilder()
             self.relationship_builder = SecurityRelationshipBuilder()
+        
+        self._query_dispatch = self._build_query_dispatch()
     
     def get_stats(self) -> Dict[str, Any]:
         """Get graph statistics"""
@@ -1,7 +1,13 @@
 """In-memory graph store (mock implementation)"""
 
-from typing import Dict, Any, List, Optional
+from collections import defaultdict
+from itertools import islice
+from typing import Dict, Any, List, Optional, Tuple, Hashable, Iterator
 
+# Node properties the SMG lookups filter on; (label, key, value) is indexed
+INDEXED_NODE_PROPERTIES = ("cve_id", "username", "user_id", "asset_id", "role_id", "criticality")
+# Upper bound on the paths find_path returns
+MAX_PATHS = 100
 
 class MockGraphStore:
     """In-memory graph store for development/testing"""
@@ -10,6 +16,22 @@ class MockGraphStore:
         self.nodes = []
         self.relationships = []
         self.node_index = {}  # Index nodes by ID for quick lookup
+        self._init_node_indices()
+        self._init_relationship_indices()
+    
+    def _init_node_indices(self):
+        """Node lists keyed by label and by (label, indexed property, value)"""
+        self.nodes_by_label: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self.nodes_by_label_prop: Dict[Tuple[str, str, Hashable], List[Dict[str, Any]]] = defaultdict(list)
+    
+    def _init_relationship_indices(self):
+        """Relationship lists keyed the way query_relationships filters them"""
+        self.rels_by_from: Dict[Tuple[str, str], List[Dict[str, Any]]] = defaultdict(list)
+        self.rels_by_to: Dict[Tuple[str, str], List[Dict[str, Any]]] = defaultdict(list)
+        self.rels_by_type: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        # Untyped adjacency, outgoing and incoming, for traversals
+        self.rels_from: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self.rels_to: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
     
     def store_graph(self, nodes: List[Dict[str, Any]], relationships: List[Dict[str, Any]]):
         """
@@ -25,12 +47,34 @@ class MockGraphStore:
             if node_id and node_id not in self.node_index:
                 self.nodes.append(node)
                 self.node_index[node_id] = node
+                self._index_node(node)
         
         # Store relationships
         self.relationships.extend(relationships)
+        for rel in relationships:
+            rel_type = rel['type']
+            # OCSF relationships carry start_node_id/end_node_id instead
+            self.rels_by_from[(rel_type, rel.get('from_id'))].append(rel)
+            self.rels_by_to[(rel_type, rel.get('to_id'))].append(rel)
+            self.rels_by_type[rel_type].append(rel)
+            self.rels_from[rel.get('from_id')].append(rel)
+            self.rels_to[rel.get('to_id')].append(rel)
         
         print(f"[OK] Stored {len(nodes)} nodes and {len(relationships)} relationships in memory")
     
+    def _index_node(self, node: Dict[str, Any]):
+        label = node['label']
+        props = node['properties']
+        self.nodes_by_label[label].append(node)
+        for key in INDEXED_NODE_PROPERTIES:
+            value = props.get(key)
+            if value is None:
+                continue  # missing/None values are matched by the label scan
+            try:
+                self.nodes_by_label_prop[(label, key, value)].append(node)
+            except TypeError:
+                pass  # unhashable value; only reachable through the label scan
+    
     def query_nodes(self, label: Optional[str] = None, properties: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """
         Query nodes by label and/or properties
@@ -45,11 +89,28 @@ class MockGraphStore:
         results = self.nodes
         
         if label:
-            results = [n for n in results if n['label'] == label]
+            results = self.nodes_by_label.get(label, [])
+            if properties:
+                # Narrow to one indexed property with a hash lookup, then
+                # filter on whatever is left
+                for key, value in properties.items():
+                    if key in INDEXED_NODE_PROPERTIES and value is not None:
+                        try:
+                            results = self.nodes_by_label_prop.get((label, key, value), [])
+                        except TypeError:
+                            continue
+                        properties = {k: v for k, v in properties.items() if k != key}
+                        break
+            results = list(results)
         
+        # One pass for all remaining filters
         if properties:
-            for key, value in properties.items():
+            if len(properties) == 1:
+                (key, value), = properties.items()
                 results = [n for n in results if n['properties'].get(key) == value]
+            else:
+                items = tuple(properties.items())
+                results = [n for n in results if all(n['properties'].get(k) == v for k, v in items)]
         
         return results
     
@@ -67,22 +128,35 @@ class MockGraphStore:
         Returns:
             List of matching relationships
         """
-        results = self.relationships
-        
+        # Typed lookups come straight from an index, in insertion order
         if rel_type:
-            results = [r for r in results if r['type'] == rel_type]
+            if from_id:
+                results = self.rels_by_from.get((rel_type, from_id), [])
+                if to_id:
+                    return [r for r in results if r['to_id'] == to_id]
+                return list(results)
+            if to_id:
+                return list(self.rels_by_to.get((rel_type, to_id), []))
+            return list(self.rels_by_type.get(rel_type, []))
         
         if from_id:
-            results = [r for r in results if r['from_id'] == from_id]
-        
+            results = self.rels_from.get(from_id, [])
+            if to_id:
+                return [r for r in results if r['to_id'] == to_id]
+            return list(results)
         if to_id:
-            results = [r for r in results if r['to_id'] == to_id]
+            return list(self.rels_to.get(to_id, []))
         
-        return results
+        return self.relationships
     
     def find_path(self, from_id: str, to_id: str, max_depth: int = 3) -> List[List[Dict[str, Any]]]:
         """
-        Find paths between two nodes (simplified BFS)
+        Find the shortest directed paths between two nodes
+        
+        Bidirectional BFS: each round expands whichever of the forward
+        (from from_id) and backward (from to_id) frontiers is smaller by
+        one level, until they meet or the combined depth reaches max_depth.
+        Parallel relationships yield separate paths.
         
         Args:
             from_id: Starting node ID
@@ -90,19 +164,73 @@ class MockGraphStore:
             max_depth: Maximum path length
         
         Returns:
-            List of paths (each path is a list of relationships)
+            List of paths (each path is a list of relationships), at most
+            MAX_PATHS of them
         """
-        # Simplified path finding - just return direct relationships for now
-        paths = []
+        if not from_id or not to_id:
+            return []
+        if from_id == to_id:
+            return [[rel] for rel in self.rels_from.get(from_id, []) if rel['to_id'] == to_id]
         
-        # Find direct relationship
-        direct_rels = [r for r in self.relationships 
-                      if r['from_id'] == from_id and r['to_id'] == to_id]
+        # node -> relationships reaching it on a shortest path from from_id
+        # (forward) or leaving it on a shortest path to to_id (backward)
+        forward = {from_id: []}
+        backward = {to_id: []}
+        forward_dist, backward_dist = {from_id: 0}, {to_id: 0}
+        forward_frontier, backward_frontier = [from_id], [to_id]
+        forward_depth = backward_depth = 0
         
-        for rel in direct_rels:
-            paths.append([rel])
+        while forward_depth + backward_depth < max_depth and forward_frontier and backward_frontier:
+            if len(forward_frontier) <= len(backward_frontier):
+                forward_depth += 1
+                layer = self._expand(forward_frontier, forward, self.rels_from, 'to_id')
+                forward.update(layer)
+                forward_dist.update(dict.fromkeys(layer, forward_depth))
+                forward_frontier = list(layer)
+                meeting = {node: forward_depth + backward_dist[node] for node in layer if node in backward}
+            else:
+                backward_depth += 1
+                layer = self._expand(backward_frontier, backward, self.rels_to, 'from_id')
+                backward.update(layer)
+                backward_dist.update(dict.fromkeys(layer, backward_depth))
+                backward_frontier = list(layer)
+                meeting = {node: backward_depth + forward_dist[node] for node in layer if node in forward}
+            
+            if meeting:
+                # A new layer can touch the other side at different depths
+                shortest = min(meeting.values())
+                paths = (
+                    head + tail
+                    for node, length in meeting.items() if length == shortest
+                    for head in self._walk(node, forward, 'from_id', from_id, prepend=False)
+                    for tail in self._walk(node, backward, 'to_id', to_id, prepend=True)
+                )
+                return list(islice(paths, MAX_PATHS))
         
-        return paths
+        return []
+    
+    @staticmethod
+    def _expand(frontier: List[str], visited: Dict[str, List[Dict[str, Any]]],
+                adjacency: Dict[str, List[Dict[str, Any]]], far_end: str) -> Dict[str, List[Dict[str, Any]]]:
+        """Next BFS level: unvisited node -> relationships reaching it from the frontier"""
+        layer: Dict[str, List[Dict[str, Any]]] = {}
+        for node in frontier:
+            for rel in adjacency.get(node, ()):
+                other = rel.get(far_end)
+                if other is not None and other not in visited:
+                    layer.setdefault(other, []).append(rel)
+        return layer
+    
+    @staticmethod
+    def _walk(node: str, parents: Dict[str, List[Dict[str, Any]]], next_end: str,
+              root: str, prepend: bool) -> Iterator[List[Dict[str, Any]]]:
+        """Relationship sequences between node and root following BFS parent links"""
+        if node == root:
+            yield []
+            return
+        for rel in parents[node]:
+            for path in MockGraphStore._walk(rel[next_end], parents, next_end, root, prepend):
+                yield [rel] + path if prepend else path + [rel]
     
     def get_neighbors(self, node_id: str, rel_type: Optional[str] = None) -> List[Dict[str, Any]]:
         """
@@ -131,6 +259,8 @@ class MockGraphStore:
         self.nodes = []
         self.relationships = []
         self.node_index = {}
+        self._init_node_indices()
+        self._init_relationship_indices()
         print("[OK] Cleared graph store")
     
     def get_stats(self) -> Dict[str, Any]:
@@ -1,15 +1,39 @@
 """Build graph nodes from security entities"""
 
 from typing import Dict, Any, List
-from src.schema import SecurityEntity, EntityType
+from src.schema import (
+    SecurityEntity, Vulnerability, Asset, User, Role, Permission,
+    SecurityEvent, CloudResource, SignInLog
+)
 from src.smg.schema import NodeType
 
+# Enum values resolved once; every emitted node carries one
+_VULNERABILITY_LABEL = NodeType.VULNERABILITY.value
+_ASSET_LABEL = NodeType.ASSET.value
+_USER_LABEL = NodeType.USER.value
+_ROLE_LABEL = NodeType.ROLE.value
+_PERMISSION_LABEL = NodeType.PERMISSION.value
+_EVENT_LABEL = NodeType.EVENT.value
+_CLOUD_RESOURCE_LABEL = NodeType.CLOUD_RESOURCE.value
+
 
 class SecurityNodeBuilder:
     """Builds graph nodes from normalized security entities"""
     
     def __init__(self):
-        self.nodes = {}  # Dictionary to track nodes by ID
+        self.nodes = {}  # (label, id) -> node, to skip duplicates
+        # Exact entity class -> node builder; also separates sign-in logs from
+        # other events without probing for log_id
+        self._node_handlers = {
+            Vulnerability: self._vulnerability_to_node,
+            Asset: self._asset_to_node,
+            User: self._user_to_node,
+            Role: self._role_to_node,
+            Permission: self._permission_to_node,
+            SignInLog: self._signin_to_node,
+            SecurityEvent: self._event_to_node,
+            CloudResource: self._cloud_to_node,
+        }
     
     def build_nodes(self, entities: List[SecurityEntity]) -> List[Dict[str, Any]]:
         """
@@ -22,144 +46,146 @@ class SecurityNodeBuilder:
             List of node dictionaries
         """
         nodes = []
+        seen = self.nodes
+        to_node = self._entity_to_node
         
         for entity in entities:
-            node = self._entity_to_node(entity)
+            node = to_node(entity)
             if node:
                 # Avoid duplicates
-                node_key = f"{node['label']}:{node['properties'].get('id', node['properties'].get('name'))}"
-                if node_key not in self.nodes:
-                    self.nodes[node_key] = node
+                props = node['properties']
+                node_key = (node['label'], props.get('id', props.get('name')))
+                if node_key not in seen:
+                    seen[node_key] = node
                     nodes.append(node)
         
         return nodes
     
     def _entity_to_node(self, entity: SecurityEntity) -> Dict[str, Any]:
         """Convert security entity to graph node"""
-        
-        if entity.entity_type == EntityType.VULNERABILITY:
-            return {
-                "label": NodeType.VULNERABILITY.value,
-                "properties": {
-                    "id": entity.id,
-                    "cve_id": entity.cve_id,
-                    "severity": entity.severity.value,
-                    "cvss_score": entity.cvss_score,
-                    "description": entity.description[:200],  # Truncate for graph storage
-                    "remediation_status": entity.remediation_status,
-                    "affected_products": ",".join(entity.affected_products) if entity.affected_products else ""
-                }
+        handler = self._node_handlers.get(type(entity))
+        if handler is None:
+            return None
+        return handler(entity)
+    
+    def _vulnerability_to_node(self, entity) -> Dict[str, Any]:
+        return {
+            "label": _VULNERABILITY_LABEL,
+            "properties": {
+                "id": entity.id,
+                "cve_id": entity.cve_id,
+                "severity": entity.severity.value,
+                "cvss_score": entity.cvss_score,
+                "description": entity.description[:200],  # Truncate for graph storage
+                "remediation_status": entity.remediation_status,
+                "affected_products": ",".join(entity.affected_products) if entity.affected_products else ""
             }
-        
-        elif entity.entity_type == EntityType.ASSET:
-            return {
-                "label": NodeType.ASSET.value,
-                "properties": {
-                    "id": entity.id,
-                    "asset_id": entity.asset_id,
-                    "hostname": entity.hostname,
-                    "asset_type": entity.asset_type,
-                    "ip_address": entity.ip_address or "",
-                    "os": entity.os or "",
-                    "owner": entity.owner or "",
-                    "department": entity.department or "",
-                    "criticality": entity.criticality
-                }
+        }
+    
+    def _asset_to_node(self, entity) -> Dict[str, Any]:
+        return {
+            "label": _ASSET_LABEL,
+            "properties": {
+                "id": entity.id,
+                "asset_id": entity.asset_id,
+                "hostname": entity.hostname,
+                "asset_type": entity.asset_type,
+                "ip_address": entity.ip_address or "",
+                "os": entity.os or "",
+                "owner": entity.owner or "",
+                "department": entity.department or "",
+                "criticality": entity.criticality
             }
-        
-        elif entity.entity_type == EntityType.USER:
-            return {
-                "label": NodeType.USER.value,
-                "properties": {
-                    "id": entity.id,
-                    "user_id": entity.user_id,
-                    "username": entity.username,
-                    "email": entity.email or "",
-                    "department": entity.department or "",
-                    "is_active": str(entity.is_active),
-                    "risk_score": entity.risk_score
-                }
+        }
+    
+    def _user_to_node(self, entity) -> Dict[str, Any]:
+        return {
+            "label": _USER_LABEL,
+            "properties": {
+                "id": entity.id,
+                "user_id": entity.user_id,
+                "username": entity.username,
+                "email": entity.email or "",
+                "department": entity.department or "",
+                "is_active": str(entity.is_active),
+                "risk_score": entity.risk_score
             }
-        
-        elif entity.entity_type == EntityType.ROLE:
-            return {
-                "label": NodeType.ROLE.value,
-                "properties": {
-                    "id": entity.id,
-                    "role_id": entity.role_id,
-                    "role_name": entity.role_name,
-                    "description": entity.description or "",
-                    "risk_level": entity.risk_level
-                }
+        }
+    
+    def _role_to_node(self, entity) -> Dict[str, Any]:
+        return {
+            "label": _ROLE_LABEL,
+            "properties": {
+                "id": entity.id,
+                "role_id": entity.role_id,
+                "role_name": entity.role_name,
+                "description": entity.description or "",
+                "risk_level": entity.risk_level
             }
-        
-        elif entity.entity_type == EntityType.PERMISSION:
-            return {
-                "label": NodeType.PERMISSION.value,
-                "properties": {
-                    "id": entity.id,
-                    "permission_id": entity.permission_id,
-                    "role_id": entity.role_id,
-                    "resource_type": entity.resource_type,
-                    "action": entity.action,
-                    "scope": entity.scope,
-                    "risk_level": entity.risk_level
-                }
+        }
+    
+    def _permission_to_node(self, entity) -> Dict[str, Any]:
+        return {
+            "label": _PERMISSION_LABEL,
+            "properties": {
+                "id": entity.id,
+                "permission_id": entity.permission_id,
+                "role_id": entity.role_id,
+                "resource_type": entity.resource_type,
+                "action": entity.action,
+                "scope": entity.scope,
+                "risk_level": entity.risk_level
             }
-        
-        elif entity.entity_type == EntityType.EVENT:
-            # Check if it's a SignInLog or SecurityEvent
-            if hasattr(entity, 'log_id'):
-                # SignInLog
-                return {
-                    "label": NodeType.EVENT.value,
-                    "properties": {
-                        "id": entity.id,
-                        "event_id": entity.log_id,
-                        "event_type": "signin",
-                        "severity": "info",
-                        "source": "signin_logs",
-                        "description": f"Sign-in by {entity.username} from {entity.source_ip}",
-                        "user_id": entity.user_id,
-                        "asset_id": "",
-                        "timestamp": str(entity.timestamp) if entity.timestamp else "",
-                        "status": entity.status,
-                        "risk_score": entity.risk_score
-                    }
-                }
-            else:
-                # SecurityEvent
-                return {
-                    "label": NodeType.EVENT.value,
-                    "properties": {
-                        "id": entity.id,
-                        "event_id": entity.event_id,
-                        "event_type": entity.event_type,
-                        "severity": entity.severity.value,
-                        "source": entity.source,
-                        "description": entity.description[:200],
-                        "user_id": entity.user_id or "",
-                        "asset_id": entity.asset_id or "",
-                        "timestamp": str(entity.timestamp) if entity.timestamp else ""
-                    }
-                }
-        
-        elif entity.entity_type == EntityType.CLOUD_RESOURCE:
-            return {
-                "label": NodeType.CLOUD_RESOURCE.value,
-                "properties": {
-                    "id": entity.id,
-                    "resource_id": entity.resource_id,
-                    "cloud_provider": entity.cloud_provider,
-                    "resource_type": entity.resource_type,
-                    "setting_name": entity.setting_name,
-                    "setting_value": entity.setting_value,
-                    "compliant": str(entity.compliant),
-                    "risk_level": entity.risk_level
-                }
+        }
+    
+    def _signin_to_node(self, entity) -> Dict[str, Any]:
+        return {
+            "label": _EVENT_LABEL,
+            "properties": {
+                "id": entity.id,
+                "event_id": entity.log_id,
+                "event_type": "signin",
+                "severity": "info",
+                "source": "signin_logs",
+                "description": f"Sign-in by {entity.username} from {entity.source_ip}",
+                "user_id": entity.user_id,
+                "asset_id": "",
+                "timestamp": str(entity.timestamp) if entity.timestamp else "",
+                "status": entity.status,
+                "risk_score": entity.risk_score
             }
-        
-        return None
+        }
+    
+    def _event_to_node(self, entity) -> Dict[str, Any]:
+        return {
+            "label": _EVENT_LABEL,
+            "properties": {
+                "id": entity.id,
+                "event_id": entity.event_id,
+                "event_type": entity.event_type,
+                "severity": entity.severity.value,
+                "source": entity.source,
+                "description": entity.description[:200],
+                "user_id": entity.user_id or "",
+                "asset_id": entity.asset_id or "",
+                "timestamp": str(entity.timestamp) if entity.timestamp else ""
+            }
+        }
+    
+    def _cloud_to_node(self, entity) -> Dict[str, Any]:
+        return {
+            "label": _CLOUD_RESOURCE_LABEL,
+            "properties": {
+                "id": entity.id,
+                "resource_id": entity.resource_id,
+                "cloud_provider": entity.cloud_provider,
+                "resource_type": entity.resource_type,
+                "setting_name": entity.setting_name,
+                "setting_value": entity.setting_value,
+                "compliant": str(entity.compliant),
+                "risk_level": entity.risk_level
+            }
+        }
     
     def get_node_count(self) -> int:
         """Get total number of unique nodes"""
@@ -1,9 +1,33 @@
 """Build relationships between security entities"""
 
-from typing import Dict, Any, List
+from collections import defaultdict
+from functools import lru_cache
+from itertools import chain
+from typing import Dict, Any, Iterator, List
 from src.schema import SecurityEntity, EntityType
 from src.smg.schema import RelationshipType, NodeType
 
+# Enum values resolved once; every emitted edge carries them
+_AFFECTS = RelationshipType.AFFECTS.value
+_HAS_ROLE = RelationshipType.HAS_ROLE.value
+_HAS_PERMISSION = RelationshipType.HAS_PERMISSION.value
+_OWNS = RelationshipType.OWNS.value
+_TRIGGERED = RelationshipType.TRIGGERED.value
+_INVOLVES = RelationshipType.INVOLVES.value
+_VULNERABILITY_LABEL = NodeType.VULNERABILITY.value
+_ASSET_LABEL = NodeType.ASSET.value
+_USER_LABEL = NodeType.USER.value
+_ROLE_LABEL = NodeType.ROLE.value
+_PERMISSION_LABEL = NodeType.PERMISSION.value
+_EVENT_LABEL = NodeType.EVENT.value
+
+
+@lru_cache(maxsize=None)
+def _event_join_fields(event_class) -> tuple:
+    """Whether an event model class declares user_id / asset_id"""
+    fields = event_class.model_fields
+    return "user_id" in fields, "asset_id" in fields
+
 
 class SecurityRelationshipBuilder:
     """Builds relationships between security graph nodes"""
@@ -11,6 +35,42 @@ class SecurityRelationshipBuilder:
     def __init__(self):
         self.relationships = []
         self.entity_map = {}  # Map entity IDs to entities for lookup
+        self._reset_indices()
+    
+    def _reset_indices(self):
+        """Join-attribute indexes; each key maps to its entities in input order"""
+        self._users_by_user_id: Dict[str, List[tuple]] = defaultdict(list)  # (position, user)
+        self._users_by_username: Dict[str, List[tuple]] = defaultdict(list)
+        self._assets_by_asset_id: Dict[str, List[SecurityEntity]] = defaultdict(list)
+        self._roles_by_role_id: Dict[str, List[SecurityEntity]] = defaultdict(list)
+        self._roles_by_source: Dict[str, List[SecurityEntity]] = defaultdict(list)
+        self._events_by_source: Dict[str, List[SecurityEntity]] = defaultdict(list)
+    
+    def _build_indices(self, buckets: Dict[EntityType, List[SecurityEntity]]):
+        """Index bucketed entities on the attributes the relationship builders join on"""
+        self._reset_indices()
+        for position, user in enumerate(buckets[EntityType.USER]):
+            self._users_by_user_id[user.user_id].append((position, user))
+            self._users_by_username[user.username].append((position, user))
+        for asset in buckets[EntityType.ASSET]:
+            self._assets_by_asset_id[asset.asset_id].append(asset)
+        for role in buckets[EntityType.ROLE]:
+            self._roles_by_role_id[role.role_id].append(role)
+            self._roles_by_source[role.metadata.get("source")].append(role)
+        for event in buckets[EntityType.EVENT]:
+            self._events_by_source[event.metadata.get("source")].append(event)
+    
+    def _users_matching(self, value: str) -> List[SecurityEntity]:
+        """Users whose user_id or username equals value, in input order, each once"""
+        by_id = self._users_by_user_id.get(value, ())
+        by_name = self._users_by_username.get(value, ())
+        if not by_name:
+            return [user for _, user in by_id]
+        if not by_id:
+            return [user for _, user in by_name]
+        merged = dict(by_id)
+        merged.update(by_name)
+        return [merged[position] for position in sorted(merged)]
     
     def build_relationships(self, entities: List[SecurityEntity]) -> List[Dict[str, Any]]:
         """
@@ -22,217 +82,226 @@ class SecurityRelationshipBuilder:
         Returns:
             List of relationship dictionaries
         """
+        relationships = list(self.iter_relationships(entities))
+        self.relationships = relationships
+        return relationships
+    
+    def iter_relationships(self, entities: List[SecurityEntity]) -> Iterator[Dict[str, Any]]:
+        """
+        Stream relationships from security entities without materializing them
+        
+        Args:
+            entities: List of SecurityEntity objects
+        
+        Returns:
+            Iterator of relationship dictionaries, in build_relationships order
+        """
         # Build entity map for quick lookup
         self.entity_map = {entity.id: entity for entity in entities}
         
-        relationships = []
+        # Bin entities by type in one pass; the sub-builders take their buckets
+        buckets = defaultdict(list)
+        for entity in entities:
+            buckets[entity.entity_type].append(entity)
+        # Hash joins below instead of nested loops over both sides
+        self._build_indices(buckets)
         
-        # Build different types of relationships
-        relationships.extend(self._build_vulnerability_relationships(entities))
-        relationships.extend(self._build_user_role_relationships(entities))
-        relationships.extend(self._build_role_permission_relationships(entities))
-        relationships.extend(self._build_asset_ownership_relationships(entities))
-        relationships.extend(self._build_event_relationships(entities))
-        relationships.extend(self._build_signin_relationships(entities))
+        assets = buckets[EntityType.ASSET]
+        events = buckets[EntityType.EVENT]
         
-        self.relationships = relationships
-        return relationships
+        # Build different types of relationships
+        return chain(
+            self._build_vulnerability_relationships(buckets[EntityType.VULNERABILITY], assets),
+            self._build_user_role_relationships(buckets[EntityType.USER]),
+            self._build_role_permission_relationships(buckets[EntityType.PERMISSION]),
+            self._build_asset_ownership_relationships(assets),
+            self._build_event_relationships(events),
+            self._build_signin_relationships(self._events_by_source.get("signin_logs", [])),
+        )
     
-    def _build_vulnerability_relationships(self, entities: List[SecurityEntity]) -> List[Dict[str, Any]]:
+    def _build_vulnerability_relationships(self, vulnerabilities: List[SecurityEntity],
+                                           assets: List[SecurityEntity]) -> Iterator[Dict[str, Any]]:
         """Build AFFECTS relationships between vulnerabilities and assets"""
-        relationships = []
-        
-        vulnerabilities = [e for e in entities if e.entity_type == EntityType.VULNERABILITY]
-        assets = [e for e in entities if e.entity_type == EntityType.ASSET]
+        # Assets sharing the same OS/type text match identically, so keywords
+        # are tested once per distinct text rather than once per asset
+        positions_by_info = defaultdict(list)
+        for position, asset in enumerate(assets):
+            positions_by_info[self._asset_info(asset)].append(position)
+        # Inverted index keyword -> matching asset positions, filled lazily
+        keyword_postings: Dict[str, List[int]] = {}
         
         for vuln in vulnerabilities:
-            for asset in assets:
-                # Match vulnerability to asset based on affected products
-                if self._vulnerability_affects_asset(vuln, asset):
-                    relationships.append({
-                        "type": RelationshipType.AFFECTS.value,
-                        "from_id": vuln.id,
-                        "from_label": NodeType.VULNERABILITY.value,
-                        "to_id": asset.id,
-                        "to_label": NodeType.ASSET.value,
-                        "properties": {
-                            "confidence": 0.8,  # Confidence score
-                            "cve_id": vuln.cve_id,
-                            "severity": vuln.severity.value
-                        }
-                    })
-        
-        return relationships
+            severity = vuln.severity.value
+            # Match vulnerability to asset based on affected products
+            matched = set()
+            for keyword in self._product_keywords(vuln):
+                postings = keyword_postings.get(keyword)
+                if postings is None:
+                    postings = keyword_postings[keyword] = self._keyword_postings(keyword, positions_by_info)
+                matched.update(postings)
+            
+            for position in sorted(matched):
+                asset = assets[position]
+                yield {
+                    "type": _AFFECTS,
+                    "from_id": vuln.id,
+                    "from_label": _VULNERABILITY_LABEL,
+                    "to_id": asset.id,
+                    "to_label": _ASSET_LABEL,
+                    "properties": {
+                        "confidence": 0.8,  # Confidence score
+                        "cve_id": vuln.cve_id,
+                        "severity": severity
+                    }
+                }
     
-    def _build_user_role_relationships(self, entities: List[SecurityEntity]) -> List[Dict[str, Any]]:
+    def _build_user_role_relationships(self, users: List[SecurityEntity]) -> Iterator[Dict[str, Any]]:
         """Build HAS_ROLE relationships between users and roles"""
-        relationships = []
-        
-        users = [e for e in entities if e.entity_type == EntityType.USER]
-        roles = [e for e in entities if e.entity_type == EntityType.ROLE]
+        # _user_has_role only compares sources, so candidates are the roles
+        # that came from user_roles too
+        user_role_roles = self._roles_by_source.get("user_roles", [])
         
         # Create user-role mapping from metadata
         for user in users:
             # Check if user has role information in metadata
             source = user.metadata.get("source", "")
             if source == "user_roles":
+                assigned_date = str(user.timestamp) if user.timestamp else ""
+                assigned_by = user.metadata.get("assigned_by", "")
                 # Find matching role
-                for role in roles:
+                for role in user_role_roles:
                     # Match based on metadata or IDs
                     if self._user_has_role(user, role):
-                        relationships.append({
-                            "type": RelationshipType.HAS_ROLE.value,
+                        yield {
+                            "type": _HAS_ROLE,
                             "from_id": user.id,
-                            "from_label": NodeType.USER.value,
+                            "from_label": _USER_LABEL,
                             "to_id": role.id,
-                            "to_label": NodeType.ROLE.value,
+                            "to_label": _ROLE_LABEL,
                             "properties": {
-                                "assigned_date": str(user.timestamp) if user.timestamp else "",
-                                "assigned_by": user.metadata.get("assigned_by", "")
+                                "assigned_date": assigned_date,
+                                "assigned_by": assigned_by
                             }
-                        })
-        
-        return relationships
+                        }
     
-    def _build_role_permission_relationships(self, entities: List[SecurityEntity]) -> List[Dict[str, Any]]:
+    def _build_role_permission_relationships(self, permissions: List[SecurityEntity]) -> Iterator[Dict[str, Any]]:
         """Build HAS_PERMISSION relationships between roles and permissions"""
-        relationships = []
-        
-        roles = [e for e in entities if e.entity_type == EntityType.ROLE]
-        permissions = [e for e in entities if e.entity_type == EntityType.PERMISSION]
-        
         for perm in permissions:
             # Find role that has this permission
-            for role in roles:
-                if perm.role_id == role.role_id:
-                    relationships.append({
-                        "type": RelationshipType.HAS_PERMISSION.value,
-                        "from_id": role.id,
-                        "from_label": NodeType.ROLE.value,
-                        "to_id": perm.id,
-                        "to_label": NodeType.PERMISSION.value,
-                        "properties": {
-                            "scope": perm.scope,
-                            "risk_level": perm.risk_level
-                        }
-                    })
-        
-        return relationships
+            for role in self._roles_by_role_id.get(perm.role_id, ()):
+                yield {
+                    "type": _HAS_PERMISSION,
+                    "from_id": role.id,
+                    "from_label": _ROLE_LABEL,
+                    "to_id": perm.id,
+                    "to_label": _PERMISSION_LABEL,
+                    "properties": {
+                        "scope": perm.scope,
+                        "risk_level": perm.risk_level
+                    }
+                }
     
-    def _build_asset_ownership_relationships(self, entities: List[SecurityEntity]) -> List[Dict[str, Any]]:
+    def _build_asset_ownership_relationships(self, assets: List[SecurityEntity]) -> Iterator[Dict[str, Any]]:
         """Build OWNS relationships between users and assets"""
-        relationships = []
-        
-        users = [e for e in entities if e.entity_type == EntityType.USER]
-        assets = [e for e in entities if e.entity_type == EntityType.ASSET]
-        
         for asset in assets:
             if asset.owner:
                 # Find user with matching username
-                for user in users:
-                    if user.username == asset.owner:
-                        relationships.append({
-                            "type": RelationshipType.OWNS.value,
-                            "from_id": user.id,
-                            "from_label": NodeType.USER.value,
-                            "to_id": asset.id,
-                            "to_label": NodeType.ASSET.value,
-                            "properties": {
-                                "department": asset.department or ""
-                            }
-                        })
-        
-        return relationships
+                for _, user in self._users_by_username.get(asset.owner, ()):
+                    yield {
+                        "type": _OWNS,
+                        "from_id": user.id,
+                        "from_label": _USER_LABEL,
+                        "to_id": asset.id,
+                        "to_label": _ASSET_LABEL,
+                        "properties": {
+                            "department": asset.department or ""
+                        }
+                    }
     
-    def _build_event_relationships(self, entities: List[SecurityEntity]) -> List[Dict[str, Any]]:
+    def _build_event_relationships(self, events: List[SecurityEntity]) -> Iterator[Dict[str, Any]]:
         """Build TRIGGERED and INVOLVES relationships for events"""
-        relationships = []
-        
-        events = [e for e in entities if e.entity_type == EntityType.EVENT]
-        users = [e for e in entities if e.entity_type == EntityType.USER]
-        assets = [e for e in entities if e.entity_type == EntityType.ASSET]
-        
         for event in events:
+            # Formatted once per event, shared by all of its edges
+            timestamp = str(event.timestamp) if event.timestamp else ""
+            # Resolved per model class rather than probed with hasattr per event
+            has_user_id, has_asset_id = _event_join_fields(type(event))
+            
             # TRIGGERED relationship (User -> Event)
-            if hasattr(event, 'user_id') and event.user_id:
-                for user in users:
-                    if user.user_id == event.user_id or user.username == event.user_id:
-                        relationships.append({
-                            "type": RelationshipType.TRIGGERED.value,
-                            "from_id": user.id,
-                            "from_label": NodeType.USER.value,
-                            "to_id": event.id,
-                            "to_label": NodeType.EVENT.value,
-                            "properties": {
-                                "timestamp": str(event.timestamp) if event.timestamp else ""
-                            }
-                        })
+            if has_user_id and event.user_id:
+                for user in self._users_matching(event.user_id):
+                    yield {
+                        "type": _TRIGGERED,
+                        "from_id": user.id,
+                        "from_label": _USER_LABEL,
+                        "to_id": event.id,
+                        "to_label": _EVENT_LABEL,
+                        "properties": {
+                            "timestamp": timestamp
+                        }
+                    }
             
             # INVOLVES relationship (Event -> Asset)
             # Only for SecurityEvent, not SignInLog
-            if hasattr(event, 'asset_id') and event.asset_id:
-                for asset in assets:
-                    if asset.asset_id == event.asset_id:
-                        relationships.append({
-                            "type": RelationshipType.INVOLVES.value,
-                            "from_id": event.id,
-                            "from_label": NodeType.EVENT.value,
-                            "to_id": asset.id,
-                            "to_label": NodeType.ASSET.value,
-                            "properties": {
-                                "timestamp": str(event.timestamp) if event.timestamp else "",
-                                "event_type": event.event_type
-                            }
-                        })
-        
-        return relationships
+            if has_asset_id and event.asset_id:
+                for asset in self._assets_by_asset_id.get(event.asset_id, ()):
+                    yield {
+                        "type": _INVOLVES,
+                        "from_id": event.id,
+                        "from_label": _EVENT_LABEL,
+                        "to_id": asset.id,
+                        "to_label": _ASSET_LABEL,
+                        "properties": {
+                            "timestamp": timestamp,
+                            "event_type": event.event_type
+                        }
+                    }
     
-    def _build_signin_relationships(self, entities: List[SecurityEntity]) -> List[Dict[str, Any]]:
+    def _build_signin_relationships(self, signin_events: List[SecurityEntity]) -> Iterator[Dict[str, Any]]:
         """Build LOGGED_ON relationships from signin logs"""
-        relationships = []
-        
-        # Signin logs are stored as EVENT entities with specific metadata
-        signin_events = [e for e in entities if e.entity_type == EntityType.EVENT and 
-                        e.metadata.get("source") == "signin_logs"]
-        users = [e for e in entities if e.entity_type == EntityType.USER]
-        assets = [e for e in entities if e.entity_type == EntityType.ASSET]
-        
+        # Signin logs are stored as EVENT entities with specific metadata;
+        # the caller passes the events indexed under source "signin_logs"
         for signin in signin_events:
             # Find user
             user_id = signin.user_id
             if user_id:
-                for user in users:
-                    if user.user_id == user_id or user.username == user_id:
-                        # For successful logins, we might infer asset from IP or other data
-                        # This is a simplified version
-                        relationships.append({
-                            "type": "SIGNED_IN",
-                            "from_id": user.id,
-                            "from_label": NodeType.USER.value,
-                            "to_id": signin.id,
-                            "to_label": NodeType.EVENT.value,
-                            "properties": {
-                                "timestamp": str(signin.timestamp) if signin.timestamp else "",
-                                "status": signin.metadata.get("status", "")
-                            }
-                        })
-        
-        return relationships
+                timestamp = str(signin.timestamp) if signin.timestamp else ""
+                status = signin.metadata.get("status", "")
+                for user in self._users_matching(user_id):
+                    # For successful logins, we might infer asset from IP or other data
+                    # This is a simplified version
+                    yield {
+                        "type": "SIGNED_IN",
+                        "from_id": user.id,
+                        "from_label": _USER_LABEL,
+                        "to_id": signin.id,
+                        "to_label": _EVENT_LABEL,
+                        "properties": {
+                            "timestamp": timestamp,
+                            "status": status
+                        }
+                    }
+    
+    @staticmethod
+    def _asset_info(asset) -> str:
+        """Lowercased OS and type text that affected-product keywords are matched against"""
+        return f"{asset.os} {asset.asset_type}".lower()
     
-    def _vulnerability_affects_asset(self, vuln, asset) -> bool:
-        """Determine if a vulnerability affects an asset"""
+    @staticmethod
+    def _product_keywords(vuln) -> tuple:
+        """Distinct lowercased keywords across a vulnerability's affected products"""
         if not vuln.affected_products:
-            return False
-        
-        # Check if asset OS or type matches affected products
-        asset_info = f"{asset.os} {asset.asset_type}".lower()
-        
-        for product in vuln.affected_products:
-            product_lower = product.lower()
-            if any(keyword in asset_info for keyword in product_lower.split()):
-                return True
-        
-        return False
+            return ()
+        return tuple(dict.fromkeys(
+            keyword for product in vuln.affected_products for keyword in product.lower().split()
+        ))
+    
+    @staticmethod
+    def _keyword_postings(keyword: str, positions_by_info: Dict[str, List[int]]) -> List[int]:
+        """Positions of the assets whose OS/type text contains keyword"""
+        # Keywords match as substrings of the asset OS/type text
+        return [position
+                for asset_info, positions in positions_by_info.items() if keyword in asset_info
+                for position in positions]
     
     def _user_has_role(self, user, role) -> bool:
         """Determine if a user has a specific role"""
@@ -1,10 +1,17 @@
 """Flask web application for Evident UI"""
 
 from flask import Flask, render_template, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import os
 import threading
+import time
 import json
+
+try:
+    import orjson
+except ImportError:  # optional: Flask's stdlib json provider is used instead
+    orjson = None
 from src.agent import EvidentAgent
 from src.connectors import db
 from src.connectors.db import reload_db, init_db as initialize_schema
@@ -15,6 +22,35 @@ app = Flask(__name__,
            template_folder='templates')
 CORS(app)
 
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider that encodes and decodes request/response bodies with orjson"""
+    
+    # Match DefaultJSONProvider output: sorted keys, datetimes as HTTP dates via default()
+    OPTIONS = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+               if orjson is not None else 0)
+    
+    def dumps(self, obj, **kwargs):
+        """Serialize with orjson, deferring to the stdlib provider for anything it rejects"""
+        # jsonify only passes indent (debug) or separators (compact)
+        if set(kwargs) - {"indent", "separators"}:
+            return super().dumps(obj, **kwargs)
+        option = self.OPTIONS | (orjson.OPT_INDENT_2 if kwargs.get("indent") else 0)
+        try:
+            return orjson.dumps(obj, default=self.default, option=option).decode()
+        except TypeError:
+            return super().dumps(obj, **kwargs)
+    
+    def loads(self, s, **kwargs):
+        """Parse with orjson unless stdlib-specific options are requested"""
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+
+if orjson is not None:
+    app.json = OrjsonProvider(app)
+
 from src.agent.audit_logger import audit_logger
 from src.config import config_loader, LLMConfig
 from src.securityagents.agent_manager import agent_manager
@@ -64,18 +100,26 @@ def _initialize_agent():
         _init_state["details"] = f"Initialization failed: {e}"
         print(f"[ERROR] Agent initialization failed: {e}")
 
+# Serializes startup initialization and /api/rebuild so overlapping builds
+# cannot interleave ingestion or publish agents out of order
+_rebuild_lock = threading.Lock()
+
 def _do_rebuild():
     """Shared logic for initialization and manual refresh"""
-    # Use mock flags from config
-    use_mock_llm = config_loader.is_mock_mode("llm")
-    use_mock_graph = config_loader.is_mock_mode("graph")
-    
-    # Initialize agent - this will trigger ingestion and component builds
     global agent
-    agent = EvidentAgent(use_mock_llm=use_mock_llm, use_mock_graph=use_mock_graph)
-    
-    # Run initial ingestion
-    agent.rebuild_dataset()
+    with _rebuild_lock:
+        # Use mock flags from config
+        use_mock_llm = config_loader.is_mock_mode("llm")
+        use_mock_graph = config_loader.is_mock_mode("graph")
+        
+        # Initialize agent - this will trigger ingestion and component builds
+        new_agent = EvidentAgent(use_mock_llm=use_mock_llm, use_mock_graph=use_mock_graph)
+        
+        # Run initial ingestion
+        new_agent.rebuild_dataset()
+        
+        # Publish only the fully built agent; requests keep the previous one until now
+        agent = new_agent
 
 # -----------------------------------------------------------------------
 # Setup detection helper — evaluated on every request, not just at startup
@@ -165,6 +209,23 @@ def agent_view(agent_id):
     return render_template('agent_view.html', agent=agent_data)
 
 
+# /api/stats and /api/sources payloads are reused for this long so polling
+# dashboards don't re-run graph and vector store counts on every request
+STATS_CACHE_TTL_SECONDS = 2.0
+_stats_cache = {}  # endpoint -> (agent, monotonic timestamp, payload)
+
+def _cached_payload(key, build):
+    """Return build()'s payload, reusing it within the TTL for the same agent"""
+    now = time.monotonic()
+    entry = _stats_cache.get(key)
+    # Keyed on the agent object too, so a rebuild never serves the old agent's numbers
+    if entry is not None and entry[0] is agent and now - entry[1] < STATS_CACHE_TTL_SECONDS:
+        return entry[2]
+    payload = build()
+    _stats_cache[key] = (agent, now, payload)
+    return payload
+
+
 @app.route('/api/status')
 def get_status():
     """Get agent initialization status"""
@@ -176,15 +237,18 @@ def get_sources():
     if not _init_state["ready"]:
         return jsonify({"sources": []})
     
-    metadata = agent.get_source_metadata()
-    sources = []
-    for name, meta in metadata.items():
-        sources.append({
-            "name": name,
-            "display_name": meta.get("display_name", name),
-            "record_count": meta.get("record_count", 0)
-        })
-    return jsonify({"sources": sources})
+    def build():
+        metadata = agent.get_source_metadata()
+        sources = []
+        for name, meta in metadata.items():
+            sources.append({
+                "name": name,
+                "display_name": meta.get("display_name", name),
+                "record_count": meta.get("record_count", 0)
+            })
+        return {"sources": sources}
+    
+    return jsonify(_cached_payload("sources", build))
 
 @app.route('/api/source-data/<source_name>')
 def get_source_data(source_name):
@@ -698,13 +762,16 @@ def get_stats():
     """Get agent and source statistics"""
     if not _init_state["ready"]:
         return jsonify({"ready": False})
-        
-    stats = agent.get_stats()
-    return jsonify({
-        "ready": True,
-        **stats,
-        "sources": agent.get_source_metadata()
-    })
+    
+    def build():
+        stats = agent.get_stats()
+        return {
+            "ready": True,
+            **stats,
+            "sources": agent.get_source_metadata()
+        }
+    
+    return jsonify(_cached_payload("stats", build))
 
 @app.route('/api/notifications')
 def get_notifications():
@@ -853,5 +920,8 @@ except Exception as e:
 
 
 if __name__ == '__main__':
+    import logging
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
     # Run Flask app
     app.run(host='0.0.0.0', port=5000, debug=False)
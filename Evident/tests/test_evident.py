@@ -8,7 +8,27 @@ import os
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import asyncio
+import random
+import threading
+from collections import OrderedDict
+from itertools import product
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from types import SimpleNamespace
+
+from datetime import datetime
+
+import src.config
 from src.agent import EvidentAgent
+from src.ingestion import SourceManager
+from src.ingestion.csv_loaders import CVELoader
+from src.schema.normalizer import SecurityNormalizer, COLUMNWISE_MIN_ROWS, frame_to_records
+from src.llm.gemini_llm import GeminiLLM, EMBED_BATCH_SIZE, EMBED_DIMENSIONS
+from src.smg.mock_store import MockGraphStore, MAX_PATHS
 
 
 def test_evident():
@@ -24,8 +44,9 @@ def test_evident():
     
     # Ingest data
     print("\n2. Ingesting data...")
-    entities = agent.ingest_data()
-    print(f"   ✓ Loaded {len(entities)} entities")
+    entity_count = agent.ingest_data()
+    print(f"   ✓ Loaded {entity_count} entities")
+    assert entity_count == len(agent.entities)
     
     # Build intelligence
     print("\n3. Building intelligence layer...")
@@ -61,5 +82,356 @@ def test_evident():
     print("="*70 + "\n")
 
 
+def _ready_agent():
+    """Mock-backed agent with data ingested and intelligence built"""
+    agent = EvidentAgent(use_mock_llm=True, use_mock_graph=True)
+    agent.ingest_data()
+    agent.build_intelligence()
+    return agent
+
+
+def test_query_cache_exact_hit():
+    """Repeating a question is answered from the cache without calling the LLM"""
+    agent = _ready_agent()
+    first = agent.query("Show me failed login attempts")
+    assert not first.get("cached")
+    
+    agent.llm.generate = lambda *args, **kwargs: pytest.fail("LLM called on a cache hit")
+    second = agent.query("Show me failed login attempts")
+    assert second["cached"] is True
+    assert second["answer"] == first["answer"]
+    assert second["tokens"] == 0 and second["cost"] == 0.0
+
+
+def test_query_cache_semantic_hit():
+    """A differently worded question close enough in embedding space reuses the answer"""
+    agent = _ready_agent()
+    agent._semantic_threshold = 0.95
+    vectors = {
+        "Show me failed login attempts": np.array([1.0, 0.0], dtype=np.float32),
+        "List failed logins": np.array([0.99, 0.141], dtype=np.float32),
+        "Which assets are exposed?": np.array([0.0, 1.0], dtype=np.float32),
+    }
+    agent._embed_for_cache = lambda question: vectors[question]
+    
+    first = agent.query("Show me failed login attempts")
+    reworded = agent.query("List failed logins")
+    assert reworded["cached"] is True
+    assert reworded["answer"] == first["answer"]
+    
+    unrelated = agent.query("Which assets are exposed?")
+    assert not unrelated.get("cached")
+    
+    # Same wording with different retrieval flags is a different question
+    assert not agent.query("List failed logins", use_graph=False).get("cached")
+
+
+def test_query_cache_embeds_through_vector_store_off_loop():
+    """The semantic tier reuses the vector store's query encoder, on a worker thread"""
+    agent = _ready_agent()
+    agent._semantic_threshold = 0.95
+    vector_store = agent.rag_engine.vector_store
+    calls = []
+    
+    def encode_query(question):
+        calls.append((question, threading.get_ident()))
+        return (1.0, 0.0)
+    
+    vector_store.embedding_model = object()
+    vector_store.encode_query = encode_query
+    
+    async def ask():
+        loop_thread = threading.get_ident()
+        await agent.aquery("Show me failed login attempts")
+        return loop_thread
+    
+    loop_thread = asyncio.run(ask())
+    assert [question for question, _ in calls] == ["Show me failed login attempts"]
+    assert all(thread != loop_thread for _, thread in calls)
+
+
+def test_query_cache_skips_errors():
+    """Provider errors come back as answers but are never cached"""
+    agent = _ready_agent()
+    calls = []
+    
+    def failing_generate(prompt, context="", **kwargs):
+        calls.append(prompt)
+        return {"text": "Error: provider unavailable", "model": "mock", "error": "unavailable"}
+    
+    agent.llm.generate = failing_generate
+    agent.query("Show me failed login attempts")
+    retry = agent.query("Show me failed login attempts")
+    assert not retry.get("cached")
+    assert len(calls) == 2
+
+
+def _graph_store(edges):
+    """MockGraphStore over (from_id, to_id) edges, one relationship each"""
+    store = MockGraphStore()
+    node_ids = sorted({node for edge in edges for node in edge})
+    nodes = [{'label': 'Asset', 'properties': {'id': node_id}} for node_id in node_ids]
+    rels = [{'type': 'CONNECTS', 'from_id': a, 'to_id': b} for a, b in edges]
+    store.store_graph(nodes, rels)
+    return store
+
+
+def _hops(paths):
+    """Paths as sorted node-ID sequences, for order-independent comparison"""
+    return sorted([path[0]['from_id']] + [rel['to_id'] for rel in path] for path in paths)
+
+
+def test_find_path_multi_hop():
+    store = _graph_store([('a', 'b'), ('b', 'c'), ('c', 'd'), ('a', 'x')])
+    assert _hops(store.find_path('a', 'd')) == [['a', 'b', 'c', 'd']]
+    # Edges are directed
+    assert store.find_path('d', 'a') == []
+
+
+def test_find_path_max_depth():
+    store = _graph_store([('a', 'b'), ('b', 'c'), ('c', 'd'), ('d', 'e')])
+    assert store.find_path('a', 'e', max_depth=3) == []
+    assert _hops(store.find_path('a', 'e', max_depth=4)) == [['a', 'b', 'c', 'd', 'e']]
+    assert _hops(store.find_path('a', 'b', max_depth=1)) == [['a', 'b']]
+
+
+def test_find_path_equal_shortest_paths():
+    # Two 2-hop routes plus a longer 3-hop one that must not be returned
+    store = _graph_store([('a', 'b'), ('a', 'c'), ('b', 'z'), ('c', 'z'),
+                          ('a', 'd'), ('d', 'e'), ('e', 'z')])
+    assert _hops(store.find_path('a', 'z')) == [['a', 'b', 'z'], ['a', 'c', 'z']]
+    
+    # Parallel relationships are separate paths
+    store = _graph_store([('a', 'b'), ('a', 'b')])
+    assert len(store.find_path('a', 'b')) == 2
+
+
+def test_find_path_caps_results():
+    # 3 layers of 5 interchangeable nodes: 125 shortest paths
+    layers = [[f"l{depth}_{i}" for i in range(5)] for depth in range(3)]
+    edges = [('s', node) for node in layers[0]]
+    edges += [(a, b) for upper, lower in zip(layers, layers[1:]) for a, b in product(upper, lower)]
+    edges += [(node, 't') for node in layers[-1]]
+    store = _graph_store(edges)
+    assert len(store.find_path('s', 't', max_depth=4)) == MAX_PATHS
+
+
+def test_find_path_same_node_and_unknown_node():
+    store = _graph_store([('a', 'a'), ('a', 'b')])
+    assert _hops(store.find_path('a', 'a')) == [['a', 'a']]
+    assert store.find_path('b', 'b') == []
+    assert store.find_path('a', 'missing') == []
+    assert store.find_path('missing', 'a') == []
+    assert store.find_path('', 'a') == []
+
+
+def test_query_nodes_none_filter_scans():
+    """None values aren't indexed, but filtering on None still finds those nodes"""
+    store = MockGraphStore()
+    store.store_graph([
+        {'label': 'User', 'properties': {'id': 'u1', 'username': 'alice'}},
+        {'label': 'User', 'properties': {'id': 'u2', 'username': None}},
+        {'label': 'User', 'properties': {'id': 'u3'}},
+    ], [])
+    assert not any(value is None for _, _, value in store.nodes_by_label_prop)
+    
+    assert [n['properties']['id'] for n in store.query_nodes('User', {'username': 'alice'})] == ['u1']
+    assert [n['properties']['id'] for n in store.query_nodes('User', {'username': None})] == ['u2', 'u3']
+    assert [n['properties']['id'] for n in store.query_nodes('User', {'username': None, 'id': 'u3'})] == ['u3']
+
+
+def _brute_force_paths(edges, from_id, to_id, max_depth):
+    """All shortest directed walks up to max_depth, by exhaustive enumeration"""
+    walks = [[from_id]]
+    for _ in range(max_depth):
+        walks = [walk + [b] for walk in walks for a, b in edges if a == walk[-1]]
+        found = sorted(walk for walk in walks if walk[-1] == to_id)
+        if found:
+            return found
+    return []
+
+
+def test_find_path_matches_brute_force():
+    rng = random.Random(7)
+    for _ in range(200):
+        node_ids = [f"n{i}" for i in range(rng.randint(2, 7))]
+        edges = [(rng.choice(node_ids), rng.choice(node_ids)) for _ in range(rng.randint(1, 12))]
+        store = _graph_store(edges)
+        from_id, to_id = rng.sample(node_ids, 2)
+        max_depth = rng.randint(1, 4)
+        expected = _brute_force_paths(edges, from_id, to_id, max_depth)
+        assert _hops(store.find_path(from_id, to_id, max_depth)) == expected[:MAX_PATHS]
+
+
+class _FakeEmbedModels:
+    """Stands in for genai Client.models; fails any request containing a 'bad' text"""
+    
+    def __init__(self):
+        self.requests = []
+    
+    def embed_content(self, model, contents):
+        self.requests.append(list(contents))
+        if any(text.startswith("bad") for text in contents):
+            raise RuntimeError("quota exceeded")
+        return SimpleNamespace(embeddings=[
+            SimpleNamespace(values=[float(len(text))] * EMBED_DIMENSIONS) for text in contents
+        ])
+
+
+def _gemini_with_fake_client():
+    """GeminiLLM wired to _FakeEmbedModels, bypassing SDK and API key setup"""
+    llm = GeminiLLM.__new__(GeminiLLM)
+    llm._embed_cache = OrderedDict()
+    llm.client = SimpleNamespace(models=_FakeEmbedModels())
+    return llm
+
+
+def test_gemini_embed_batch_caches_by_content():
+    llm = _gemini_with_fake_client()
+    requests = llm.client.models.requests
+    
+    vectors = llm.embed_batch(["a", "bb", "a"])
+    assert requests == [["a", "bb"]]
+    assert [v[0] for v in vectors] == [1.0, 2.0, 1.0]
+    assert all(v.dtype == np.float32 and v.shape == (EMBED_DIMENSIONS,) for v in vectors)
+    
+    # Only the new text is sent; cached arrays are read-only since they are shared
+    vectors = llm.embed_batch(["bb", "ccc"])
+    assert requests[-1] == ["ccc"]
+    assert not vectors[0].flags.writeable
+    
+    # Misses are sent in EMBED_BATCH_SIZE chunks
+    llm.embed_batch([f"text {i}" for i in range(EMBED_BATCH_SIZE + 1)])
+    assert [len(r) for r in requests[-2:]] == [EMBED_BATCH_SIZE, 1]
+
+
+def test_gemini_embed_batch_zero_vector_fallback():
+    llm = _gemini_with_fake_client()
+    requests = llm.client.models.requests
+    
+    vectors = llm.embed_batch(["bad text"])
+    assert not vectors[0].any() and vectors[0].shape == (EMBED_DIMENSIONS,)
+    
+    # Failures aren't cached, so the text is retried next time
+    llm.embed_batch(["bad text"])
+    assert requests == [["bad text"], ["bad text"]]
+
+
+def _signin_frame(start, rows):
+    """Sign-in rows as the CSV loader types them, with mixed date shapes and flags"""
+    stamps = ["2024-01-02", "2024-01-02 03:04:05", "2024-01-02T03:04:05", "not a date", None]
+    flags = ["True", "false", "YES", "1", None]
+    frame = pd.DataFrame({
+        "log_id": [f"log_{i}" for i in range(start, start + rows)],
+        "timestamp": [stamps[i % len(stamps)] for i in range(start, start + rows)],
+        "user_id": [f"u{i % 7}" for i in range(start, start + rows)],
+        "username": [f"user{i % 7}" for i in range(start, start + rows)],
+        "mfa_used": [flags[i % len(flags)] for i in range(start, start + rows)],
+        "risk_score": [float(i % 10) for i in range(start, start + rows)],
+    })
+    return frame.astype({"timestamp": object, "mfa_used": object})
+
+
+def test_normalize_frames_matches_row_path():
+    """Many tiny frames around one large one normalize exactly like their records, in order"""
+    frames = [_signin_frame(i, 1) for i in range(50)]
+    frames.append(_signin_frame(50, COLUMNWISE_MIN_ROWS + 5))
+    frames += [_signin_frame(10_000 + i, 1 + i % 3) for i in range(50)]
+    # Consecutive large frames of one layout are concatenated, others kept apart
+    frames.append(_signin_frame(20_000, COLUMNWISE_MIN_ROWS))
+    frames.append(_signin_frame(25_000, COLUMNWISE_MIN_ROWS))
+    frames.append(_signin_frame(30_000, COLUMNWISE_MIN_ROWS).drop(columns=["mfa_used"]))
+    ingest_ts = datetime(2024, 6, 1)
+    
+    from_frames = SecurityNormalizer().normalize_frames(frames, "signin_logs", ingest_ts)
+    records = [record for frame in frames for record in frame_to_records(frame)]
+    from_rows = SecurityNormalizer().normalize(records, "signin_logs", ingest_ts)
+    assert len(from_frames) == len(records)
+    assert [e.model_dump() for e in from_frames] == [e.model_dump() for e in from_rows]
+
+
+def test_normalizer_batch_timestamp_is_scoped():
+    """Undated rows share the batch's ingest time only while that batch runs"""
+    normalizer = SecurityNormalizer()
+    batch_ts = datetime(2020, 1, 1)
+    rows = [{"resource_id": "r1", "compliant": "true"}, {"resource_id": "r2", "compliant": "false"}]
+    
+    entities = normalizer.normalize(rows, "cloud_configs", ingest_ts=batch_ts)
+    assert [e.timestamp for e in entities] == [batch_ts, batch_ts]
+    
+    frames = normalizer.normalize_frames([pd.DataFrame(rows)], "cloud_configs", ingest_ts=batch_ts)
+    assert [e.timestamp for e in frames] == [batch_ts, batch_ts]
+    
+    # A later direct call doesn't inherit the previous batch's timestamp
+    assert normalizer._normalize_cloud_config(rows[0]).timestamp > batch_ts
+
+
+def test_source_views_are_copies_and_follow_status():
+    manager = SourceManager(data_path=src.config.app_config.ingestion.data_path)
+    name, source = next(iter(manager.sources.items()))
+    
+    # Mutating what callers get back leaves the cached views intact
+    manager.get_source_status()[name] = "tampered"
+    manager.get_metadata()[name]["record_count"] = -1
+    assert manager.get_source_status()[name] == "not_loaded"
+    assert manager.get_metadata()[name]["record_count"] == 0
+    
+    # Status transitions inside a load show up without the manager invalidating
+    seen = []
+    source._read_records = lambda: seen.append(manager.get_source_status()[name]) or [{}, {}]
+    source.load()
+    assert seen == ["loading"]
+    assert manager.get_source_status()[name] == "loaded"
+    assert manager.get_total_records() == 2
+
+
+def test_csv_iter_records_tracks_status(tmp_path):
+    nested = tmp_path / "2024"
+    nested.mkdir()
+    (tmp_path / "a.csv").write_text("cve_id,cvss_score\nCVE-2024-0001,9.8\n,\nCVE-2024-0002,5.0\n")
+    (nested / "b.csv").write_text("cve_id,cvss_score\nCVE-2024-0003,7.1\n")
+    loader = CVELoader(str(tmp_path))
+    
+    records = loader.iter_records(batch_rows=1)
+    first = next(records)
+    assert first["cve_id"] == "CVE-2024-0001"
+    assert loader.metadata.status == "loading"
+    
+    rest = list(records)
+    assert len(rest) == 2  # the all-empty row is dropped
+    assert loader.metadata.status == "loaded"
+    assert loader.metadata.record_count == 3
+    assert loader.metadata.last_loaded
+    
+    # A consumer that stops early leaves the previous status, not "loading"
+    records = loader.iter_records(batch_rows=1)
+    next(records)
+    records.close()
+    assert loader.metadata.status == "loaded"
+    assert loader.metadata.record_count == 3
+    
+    fresh = CVELoader(str(tmp_path))
+    for _ in fresh.iter_records():
+        break
+    assert fresh.metadata.status == "not_loaded"
+    
+    missing = CVELoader(str(tmp_path / "missing"))
+    assert list(missing.iter_records()) == []
+    assert missing.metadata.status == "error"
+    assert missing.load() == [] and missing.metadata.status == "error"
+
+
+def test_query_inside_running_event_loop():
+    """The blocking query() still works when called from async code"""
+    agent = _ready_agent()
+    
+    async def ask():
+        return agent.query("Show me failed login attempts")
+    
+    response = asyncio.run(ask())
+    assert response["answer"]
+    assert response["sources"]
+
+
 if __name__ == '__main__':
     test_evident()
@@ -13,19 +13,24 @@ from vectorscope.attacks.pattern_attack import PatternRecognitionAttack
 init(autoreset=True)
 
 class VectorScopeCLI:
-    def __init__(self):
-        self.db = VectorDatabase()
+    def _connect(self, embedding_precision: str = "fp32"):
+        """Open the vector database and set up the attacks against it"""
+        self.db = VectorDatabase(embedding_precision=embedding_precision)
         self.attacks = {
             'similarity': SimilarityAttack(self.db),
             'reconstruction': ReconstructionAttack(self.db),
             'pattern': PatternRecognitionAttack(self.db)
         }
+        # (method, attack) pairs run by --method all, resolved once
+        self._all_attacks = list(self.attacks.items())
 
     def run(self):
         parser = argparse.ArgumentParser(
             description=f"{Fore.CYAN}VectorScope: Vector Database Security Research Tool{Style.RESET_ALL}",
             formatter_class=argparse.RawDescriptionHelpFormatter
         )
+        parser.add_argument('--precision', choices=['fp32', 'fp16'], default='fp32',
+                            help='Embedding model precision (fp16 needs a CUDA device)')
         subparsers = parser.add_subparsers(dest='command', help='Commands')
 
         # Store command
@@ -46,6 +51,12 @@ class VectorScopeCLI:
         subparsers.add_parser('clear', help='Clear all stored vectors')
 
         args = parser.parse_args()
+        if args.command is None:
+            parser.print_help()
+            return
+
+        # Loaded after parsing, so --precision applies and help stays instant
+        self._connect(args.precision)
 
         if args.command == 'store':
             self._handle_store(args)
@@ -81,25 +92,23 @@ class VectorScopeCLI:
         target_vec = None
         ground_truth = "Unknown"
 
-        vectors = self.db.get_all_vectors()
-        if not vectors:
+        if not self.db.count():
             print(f"{Fore.RED}Error: No vectors to attack.{Style.RESET_ALL}")
             return
 
         if not vid:
             # Use latest
-            latest = vectors[-1]
+            latest = self.db.get_all_vectors()[-1]
             vid = latest['id']
             target_vec = latest['embedding']
             ground_truth = latest['metadata'].get('original_text', 'Unknown')
             print(f"Attacking latest vector: {Fore.CYAN}{vid}{Style.RESET_ALL}")
         else:
-            # Find specific
-            for v in vectors:
-                if v['id'] == vid:
-                    target_vec = v['embedding']
-                    ground_truth = v['metadata'].get('original_text', 'Unknown')
-                    break
+            # Find specific by ID instead of fetching and scanning every vector
+            target_vec = self.db.get_vector(vid)
+            if target_vec is not None:
+                metadata = self.db.get_metadata(vid) or {}
+                ground_truth = metadata.get('original_text', 'Unknown')
             
             if target_vec is None:
                 print(f"{Fore.RED}Error: Vector ID {vid} not found.{Style.RESET_ALL}")
@@ -110,11 +119,10 @@ class VectorScopeCLI:
         print(f"Ground Truth Label: {ground_truth}") # For research validation
         print(f"Known format template: {args.type}")
         
-        methods = ['similarity', 'reconstruction', 'pattern'] if args.method == 'all' else [args.method]
+        attacks = self._all_attacks if args.method == 'all' else [(args.method, self.attacks[args.method])]
         
-        for method in methods:
+        for method, attack_obj in attacks:
             print(f"\n{Fore.YELLOW}Executing {method} method...{Style.RESET_ALL}")
-            attack_obj = self.attacks[method]
             result = attack_obj.execute(target_vec, data_type=args.type)
             
             print(result)
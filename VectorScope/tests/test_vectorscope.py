@@ -0,0 +1,97 @@
+"""
+Tests for VectorScope helpers that run without the embedding model
+"""
+
+import sys
+import os
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vectorscope.attacks.base_attack import top_k_indices
+from vectorscope.storage import VectorDatabase
+
+
+def test_top_k_indices_matches_stable_sort():
+    """Same indices, in the same order, as a stable descending argsort"""
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        # Few distinct values, so ties straddle the k-th score
+        scores = rng.integers(0, 5, size=rng.integers(1, 40)).astype(np.float32)
+        for k in (1, 3, 5, len(scores), len(scores) + 2):
+            expected = np.argsort(-scores, kind='stable')[:k]
+            assert top_k_indices(scores, k).tolist() == expected.tolist()
+
+
+def test_top_k_indices_edge_cases():
+    scores = np.array([0.2, 0.9, 0.5])
+    assert top_k_indices(scores, 0).tolist() == []
+    assert top_k_indices(scores, -1).tolist() == []
+    assert top_k_indices(np.array([]), 5).tolist() == []
+    assert top_k_indices(scores, 2).tolist() == [1, 2]
+
+
+class _CountingEmbedder:
+    """Deterministic stand-in for the sentence-transformer, recording what it encodes"""
+    
+    class device:
+        type = "cuda"  # keeps _encode off the multi-process path
+    
+    def __init__(self):
+        self.encoded = []
+    
+    def encode(self, texts, show_progress_bar=False):
+        self.encoded.extend(texts)
+        return np.array([[len(text), sum(map(ord, text)) % 97, 1.0] for text in texts], dtype=np.float64)
+
+
+def _database(persist_directory, embedder, model="test-model", precision="fp32"):
+    """VectorDatabase with only the embedding side set up (no Chroma, no model download)"""
+    db = VectorDatabase.__new__(VectorDatabase)
+    db.persist_directory = str(persist_directory)
+    db.embedder = embedder
+    db.embedding_model = model
+    db.embedding_precision = precision
+    db._embedding_cache = db._open_embedding_cache()
+    return db
+
+
+def test_embed_batch_reuses_sqlite_cache(tmp_path):
+    embedder = _CountingEmbedder()
+    db = _database(tmp_path, embedder)
+    texts = ["SSN: 123-45-6789", "SSN: 000-00-0000", "SSN: 123-45-6789"]
+    
+    first = db.embed_batch(texts, cache=True)
+    assert first.dtype == np.float32 and first.shape == (3, 3)
+    # Duplicates in one batch are encoded once
+    assert embedder.encoded == ["SSN: 123-45-6789", "SSN: 000-00-0000"]
+    np.testing.assert_array_equal(first[0], first[2])
+    
+    # A new instance on the same directory reads the persisted vectors
+    reopened_embedder = _CountingEmbedder()
+    reopened = _database(tmp_path, reopened_embedder)
+    second = reopened.embed_batch(texts + ["SSN: 999-99-9999"], cache=True)
+    assert reopened_embedder.encoded == ["SSN: 999-99-9999"]
+    np.testing.assert_array_equal(second[:3], first)
+    
+    # Another model or precision doesn't see those entries
+    other_embedder = _CountingEmbedder()
+    _database(tmp_path, other_embedder, precision="fp16").embed_batch(texts[:1], cache=True)
+    assert other_embedder.encoded == texts[:1]
+
+
+def test_embed_batch_without_cache_leaves_sqlite_alone(tmp_path):
+    embedder = _CountingEmbedder()
+    db = _database(tmp_path, embedder)
+    rows = lambda: db._embedding_cache.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+    
+    vectors = db.embed_batch(["SSN: 111-11-1111", "SSN: 222-22-2222", "SSN: 111-11-1111"])
+    assert embedder.encoded == ["SSN: 111-11-1111", "SSN: 222-22-2222"]
+    np.testing.assert_array_equal(vectors[0], vectors[2])
+    assert rows() == 0
+    
+    # Not read back either: a default call encodes again
+    db.embed_batch(["SSN: 111-11-1111"])
+    assert embedder.encoded[-1] == "SSN: 111-11-1111" and len(embedder.encoded) == 3
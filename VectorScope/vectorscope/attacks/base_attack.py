@@ -2,9 +2,39 @@
 
 from abc import ABC, abstractmethod
 from typing import Dict, Any, Optional
+import operator
 import numpy as np
 from dataclasses import dataclass
 
+# ASCII bytes that are not alphanumeric, deleted by bytes.translate in evaluate()
+ASCII_NON_ALNUM = bytes(i for i in range(128) if not chr(i).isalnum())
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores, best first
+    
+    Selects in O(n) with a partition instead of sorting every score. Equal
+    scores keep their input order, as a stable descending sort would.
+    
+    Args:
+        scores: 1-D array of scores
+        k: Number of indices to return
+    
+    Returns:
+        Array of at most k indices into scores
+    """
+    n = len(scores)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k >= n:
+        return np.argsort(-scores, kind='stable')
+    kth = np.partition(scores, n - k)[n - k]  # k-th largest score
+    above = np.flatnonzero(scores > kth)
+    ties = np.flatnonzero(scores == kth)[:k - len(above)]
+    selected = np.concatenate([above, ties])
+    return selected[np.argsort(-scores[selected], kind='stable')]
+
 
 @dataclass
 class AttackResult:
@@ -70,10 +100,15 @@ class BaseAttack(ABC):
         exact_match = extracted == ground_truth
         
         # Partial match (for structured data)
-        extracted_clean = ''.join(c for c in extracted if c.isalnum())
-        truth_clean = ''.join(c for c in ground_truth if c.isalnum())
+        if extracted.isascii() and ground_truth.isascii():
+            # Strip and compare in C; ASCII bytes map one-to-one to characters
+            extracted_clean = extracted.encode('ascii').translate(None, ASCII_NON_ALNUM)
+            truth_clean = ground_truth.encode('ascii').translate(None, ASCII_NON_ALNUM)
+        else:
+            extracted_clean = ''.join(c for c in extracted if c.isalnum())
+            truth_clean = ''.join(c for c in ground_truth if c.isalnum())
         
-        char_matches = sum(1 for a, b in zip(extracted_clean, truth_clean) if a == b)
+        char_matches = sum(map(operator.eq, extracted_clean, truth_clean))
         partial_accuracy = char_matches / max(len(truth_clean), 1)
         
         return {
@@ -34,6 +34,12 @@ class PatternRecognitionAttack(BaseAttack):
         
         self.centroids['ssn'] = np.mean(ssn_vecs, axis=0)
         self.centroids['creditcard'] = np.mean(cc_vecs, axis=0)
+        
+        # Unit-length centroid rows, so scoring a target is one product
+        # and one norm instead of a compute_similarity call per centroid
+        self.centroid_labels = list(self.centroids)
+        matrix = np.stack([self.centroids[label] for label in self.centroid_labels])
+        self.centroid_matrix = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
 
     def execute(self, target_vector: np.ndarray, **kwargs) -> AttackResult:
         """
@@ -45,10 +51,8 @@ class PatternRecognitionAttack(BaseAttack):
         start_time = time.time()
         
         # 1. Detect Data Type
-        similarities = {
-            dtype: self.vector_db.compute_similarity(target_vector, centroid)
-            for dtype, centroid in self.centroids.items()
-        }
+        scores = (self.centroid_matrix @ target_vector) / np.linalg.norm(target_vector)
+        similarities = dict(zip(self.centroid_labels, scores.tolist()))
         detected_type = max(similarities, key=similarities.get)
         confidence = similarities[detected_type]
         
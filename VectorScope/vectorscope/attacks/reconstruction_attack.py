@@ -1,9 +1,22 @@
 """Optimization-based vector reconstruction attack"""
 
 import numpy as np
+import re
 import time
 from typing import List, Dict, Any, Optional
-from .base_attack import BaseAttack, AttackResult
+from .base_attack import BaseAttack, AttackResult, top_k_indices
+
+# Lookup from drawn digit value to its character
+DIGIT_CHARS = np.array(list("0123456789"))
+
+# Starting text for each data type; every run of digits is one segment
+SSN_TEMPLATE = "SSN: 000-00-0000"
+CC_TEMPLATE = "Credit Card: 0000-0000-0000-0000"
+
+
+def digit_segments(template: str) -> List[tuple]:
+    """Return (start, end) of each run of digits in template"""
+    return [match.span() for match in re.finditer(r"\d+", template)]
 
 
 class ReconstructionAttack(BaseAttack):
@@ -62,16 +75,17 @@ class ReconstructionAttack(BaseAttack):
         print("\nReconstructing SSN via iterative optimization...")
         
         # Initial candidates
-        candidates = ["SSN: 000-00-0000"]
+        candidates = [SSN_TEMPLATE]
+        area, group, serial = digit_segments(SSN_TEMPLATE)
         
         # 1. Optimize Area (3 digits) - for demo we'll sample promising areas
-        candidates = self._optimize_segment(target_vector, candidates, 5, 8, 100)
+        candidates = self._optimize_segment(target_vector, candidates, *area, 100)
         
         # 2. Optimize Group (2 digits)
-        candidates = self._optimize_segment(target_vector, candidates, 9, 11, 50)
+        candidates = self._optimize_segment(target_vector, candidates, *group, 50)
         
         # 3. Optimize Serial (4 digits)
-        candidates = self._optimize_segment(target_vector, candidates, 12, 16, 50)
+        candidates = self._optimize_segment(target_vector, candidates, *serial, 50)
         
         return candidates[0]
 
@@ -80,10 +94,10 @@ class ReconstructionAttack(BaseAttack):
         # Simplified reconstruction for demo
         print("\nReconstructing Credit Card via iterative optimization...")
         
-        candidates = ["Credit Card: 0000-0000-0000-0000"]
+        candidates = [CC_TEMPLATE]
         
         # Optimize segments of 4 digits
-        for start, end in [(13, 17), (18, 22), (23, 27), (28, 32)]:
+        for start, end in digit_segments(CC_TEMPLATE):
              candidates = self._optimize_segment(target_vector, candidates, start, end, 50)
              
         return candidates[0]
@@ -91,24 +105,22 @@ class ReconstructionAttack(BaseAttack):
     def _optimize_segment(self, target_vector: np.ndarray, current_candidates: List[str], 
                           start: int, end: int, num_samples: int) -> List[str]:
         """Try random digit replacements in segment and keep best ones"""
-        scored_candidates = []
+        # Variations of every beam, embedded together in one batch
+        local_vars = []
         
         for base in current_candidates:
-            # Generate local variations for the segment
-            local_vars = []
-            for _ in range(num_samples):
-                chars = list(base)
-                for i in range(start, end):
-                    if chars[i].isdigit():
-                        chars[i] = str(np.random.randint(0, 10))
-                local_vars.append("".join(chars))
-            
-            # Embed and score
-            embeddings = self.vector_db.embed_batch(local_vars)
-            for i, emb in enumerate(embeddings):
-                sim = self.vector_db.compute_similarity(target_vector, emb)
-                scored_candidates.append((sim, local_vars[i]))
+            # Generate local variations for the segment; all digits are drawn in
+            # one call, row-major, the same stream as one randint per digit.
+            # Segments are whole digit runs, so each row of drawn characters is
+            # viewed as one string and spliced between the fixed text around it
+            draws = DIGIT_CHARS[np.random.randint(0, 10, size=(num_samples, end - start))]
+            segments = draws.view(f"<U{end - start}").ravel().tolist()
+            head, tail = base[:start], base[end:]
+            local_vars.extend(head + segment + tail for segment in segments)
+        
+        # Embed and score
+        embeddings = self.vector_db.embed_batch(local_vars)
+        similarities = self.vector_db.compute_similarity_batch(target_vector, embeddings)
         
-        # Sort by similarity and keep top
-        scored_candidates.sort(key=lambda x: x[0], reverse=True)
-        return [text for sim, text in scored_candidates[:5]] # Return top 5
+        # Keep the most similar without sorting every variation
+        return [local_vars[i] for i in top_k_indices(similarities, 5)] # Return top 5
@@ -3,8 +3,7 @@
 import numpy as np
 from typing import List, Dict, Any
 import time
-from tqdm import tqdm
-from .base_attack import BaseAttack, AttackResult
+from .base_attack import BaseAttack, AttackResult, top_k_indices
 
 
 class SimilarityAttack(BaseAttack):
@@ -21,6 +20,8 @@ class SimilarityAttack(BaseAttack):
     def __init__(self, vector_db):
         super().__init__(vector_db)
         self.candidates_cache = {}
+        # data_type -> embeddings of a prefix of that type's candidate list
+        self.embeddings_cache: Dict[str, np.ndarray] = {}
     
     def generate_ssn_candidates(self, sample_size: int = 1000) -> List[str]:
         """
@@ -32,7 +33,8 @@ class SimilarityAttack(BaseAttack):
         Returns:
             List of SSN candidates in format "SSN: XXX-XX-XXXX"
         """
-        if 'ssn' in self.candidates_cache:
+        # Generation is seeded, so a larger list extends the cached one
+        if len(self.candidates_cache.get('ssn', ())) >= sample_size:
             return self.candidates_cache['ssn'][:sample_size]
         
         print(f"Generating {sample_size} SSN candidates...")
@@ -61,7 +63,7 @@ class SimilarityAttack(BaseAttack):
         Returns:
             List of credit card candidates
         """
-        if 'cc' in self.candidates_cache:
+        if len(self.candidates_cache.get('cc', ())) >= sample_size:
             return self.candidates_cache['cc'][:sample_size]
         
         print(f"Generating {sample_size} credit card candidates...")
@@ -116,6 +118,27 @@ class SimilarityAttack(BaseAttack):
         else:
             raise ValueError(f"Unknown data type: {data_type}")
     
+    def embed_candidates(self, data_type: str, candidates: List[str]) -> np.ndarray:
+        """
+        Embed candidates, reusing embeddings from earlier calls
+        
+        Args:
+            data_type: 'ssn' or 'creditcard'
+            candidates: Prefix of the generated candidate list for data_type
+        
+        Returns:
+            Array of embeddings, one row per candidate
+        """
+        cached = self.embeddings_cache.get(data_type)
+        embedded = 0 if cached is None else len(cached)
+        if embedded < len(candidates):
+            # Only the candidates beyond the cached prefix need the model;
+            # the lists are seeded, so they persist across runs too
+            fresh = self.vector_db.embed_batch(candidates[embedded:], cache=True)
+            cached = fresh if cached is None else np.concatenate([cached, fresh])
+            self.embeddings_cache[data_type] = cached
+        return cached[:len(candidates)]
+    
     def execute(self, target_vector: np.ndarray, data_type: str = 'ssn', 
                 sample_size: int = 1000, **kwargs) -> AttackResult:
         """
@@ -138,17 +161,14 @@ class SimilarityAttack(BaseAttack):
         
         # Embed all candidates
         print("Embedding candidates...")
-        candidate_embeddings = self.vector_db.embed_batch(candidates)
+        candidate_embeddings = self.embed_candidates(data_type, candidates)
         
         # Compute similarities
         print("Computing similarities...")
-        similarities = []
-        for embedding in tqdm(candidate_embeddings, desc="Similarity search"):
-            sim = self.vector_db.compute_similarity(target_vector, embedding)
-            similarities.append(sim)
+        similarities = self.vector_db.compute_similarity_batch(target_vector, candidate_embeddings)
         
         # Find best match
-        best_idx = np.argmax(similarities)
+        best_idx = int(np.argmax(similarities))
         best_similarity = similarities[best_idx]
         extracted_text = candidates[best_idx]
         
@@ -167,7 +187,7 @@ class SimilarityAttack(BaseAttack):
             metadata={
                 'data_type': data_type,
                 'sample_size': sample_size,
-                'top_5_similarities': sorted(similarities, reverse=True)[:5]
+                'top_5_similarities': similarities[top_k_indices(similarities, 5)].tolist()
             }
         )
     
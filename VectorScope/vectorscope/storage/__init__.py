@@ -1,27 +1,53 @@
 """Vector database storage and embedding generation"""
 
-import chromadb
-from chromadb.config import Settings
-from sentence_transformers import SentenceTransformer
 import numpy as np
 from typing import List, Dict, Any, Optional
+import hashlib
+import os
+import sqlite3
 import uuid
 
+# Batches at least this long are encoded by a pool of worker processes;
+# smaller ones don't repay the per-worker model load
+PARALLEL_EMBED_MIN_TEXTS = 5000
+PARALLEL_EMBED_MAX_WORKERS = 4
+PARALLEL_EMBED_BATCH_SIZE = 64
+
+# Embeddings of previously encoded texts, kept next to the Chroma files and
+# keyed by model + text, so seeded candidate lists are encoded only once.
+# Only embed_batch(..., cache=True) callers read and write it; one-off random
+# variations would grow the file without ever being read back
+EMBEDDING_CACHE_FILE = "embedding_cache.sqlite3"
+EMBEDDING_CACHE_QUERY_CHUNK = 500  # stays under SQLite's bound-parameter limit
+
 
 class VectorDatabase:
     """Manages vector storage and retrieval"""
     
     def __init__(self, persist_directory: str = "./vector_db", 
-                 embedding_model: str = "all-MiniLM-L6-v2"):
+                 embedding_model: str = "all-MiniLM-L6-v2",
+                 embedding_precision: str = "fp32"):
         """
         Initialize vector database
         
         Args:
             persist_directory: Directory to persist vectors
             embedding_model: Sentence transformer model name
+            embedding_precision: "fp32", or "fp16" to run the model in half
+                precision when it is on a CUDA device
         """
         self.persist_directory = persist_directory
         
+        # get_all_vectors() snapshot, reused until store_text()/clear() bump _version
+        self._version = 0
+        self._all_vectors_cache: Optional[List[Dict[str, Any]]] = None
+        self._all_vectors_version = -1
+        
+        # Imported here so importing the package (CLI help, attack modules)
+        # doesn't pull in chromadb and torch
+        import chromadb
+        from sentence_transformers import SentenceTransformer
+        
         # Initialize ChromaDB
         self.client = chromadb.PersistentClient(path=persist_directory)
         
@@ -40,7 +66,17 @@ class VectorDatabase:
         print(f"Loading embedding model: {embedding_model}...")
         self.embedder = SentenceTransformer(embedding_model)
         self.embedding_dim = self.embedder.get_sentence_embedding_dimension()
-        print(f"[OK] Model loaded (dimension: {self.embedding_dim})")
+        if embedding_precision == "fp16":
+            if self.embedder.device.type == "cuda":
+                self.embedder.half()
+            else:
+                print(f"[WARN] fp16 embeddings need a CUDA device, using fp32 on {self.embedder.device}")
+                embedding_precision = "fp32"
+        print(f"[OK] Model loaded (dimension: {self.embedding_dim}, {embedding_precision})")
+        
+        self.embedding_model = embedding_model
+        self.embedding_precision = embedding_precision
+        self._embedding_cache = self._open_embedding_cache()
     
     def store_text(self, text: str, metadata: Optional[Dict[str, Any]] = None) -> str:
         """
@@ -72,6 +108,7 @@ class VectorDatabase:
             metadatas=[metadata],
             ids=[vector_id]
         )
+        self._version += 1
         
         return vector_id
     
@@ -86,16 +123,32 @@ class VectorDatabase:
             Vector as numpy array or None if not found
         """
         try:
-            result = self.collection.get(
-                ids=[vector_id],
-                include=["embeddings"]
-            )
-            if result['embeddings']:
-                return np.array(result['embeddings'][0])
-            return None
+            return self.get_vectors([vector_id])[0]
         except:
             return None
     
+    def get_vectors(self, vector_ids: List[str]) -> np.ndarray:
+        """
+        Retrieve several vectors in one collection read
+        
+        Args:
+            vector_ids: Vector identifiers
+        
+        Returns:
+            Array with one row per ID, in the order given
+        
+        Raises:
+            KeyError: If any ID is not stored
+        """
+        result = self.collection.get(ids=list(vector_ids), include=["embeddings"])
+        # Chroma doesn't guarantee the requested order, so realign by ID
+        row_by_id = {vector_id: i for i, vector_id in enumerate(result['ids'])}
+        missing = [vector_id for vector_id in vector_ids if vector_id not in row_by_id]
+        if missing:
+            raise KeyError(f"Vector IDs not found: {missing}")
+        embeddings = np.asarray(result['embeddings'])
+        return embeddings[[row_by_id[vector_id] for vector_id in vector_ids]]
+    
     def get_metadata(self, vector_id: str) -> Optional[Dict[str, Any]]:
         """Get metadata for a vector"""
         try:
@@ -110,18 +163,22 @@ class VectorDatabase:
             return None
     
     def get_all_vectors(self) -> List[Dict[str, Any]]:
-        """Get all stored vectors with metadata"""
+        """Get all stored vectors with metadata (shared snapshot; do not mutate)"""
+        if self._all_vectors_version != self._version:
+            self._all_vectors_cache = self._load_all_vectors()
+            self._all_vectors_version = self._version
+        return self._all_vectors_cache
+    
+    def _load_all_vectors(self) -> List[Dict[str, Any]]:
+        """Read every stored vector and its metadata from the collection"""
         result = self.collection.get(include=["embeddings", "metadatas"])
         
-        vectors = []
-        for i, vector_id in enumerate(result['ids']):
-            vectors.append({
-                'id': vector_id,
-                'embedding': np.array(result['embeddings'][i]),
-                'metadata': result['metadatas'][i]
-            })
-        
-        return vectors
+        # One conversion for the whole result; each row is a view into it
+        embeddings = np.asarray(result['embeddings'])
+        return [
+            {'id': vector_id, 'embedding': embedding, 'metadata': metadata}
+            for vector_id, embedding, metadata in zip(result['ids'], embeddings, result['metadatas'])
+        ]
     
     def embed_text(self, text: str) -> np.ndarray:
         """
@@ -133,19 +190,105 @@ class VectorDatabase:
         Returns:
             Embedding vector
         """
-        return self.embedder.encode([text])[0]
+        return self.embedder.encode([text])[0].astype(np.float32, copy=False)
     
-    def embed_batch(self, texts: List[str]) -> np.ndarray:
+    def embed_batch(self, texts: List[str], cache: bool = False) -> np.ndarray:
         """
         Generate embeddings for multiple texts
         
         Args:
             texts: List of texts to embed
+            cache: Read and write the persistent embedding cache; for texts
+                that will be embedded again, such as seeded candidate lists
         
         Returns:
             Array of embeddings
         """
-        return self.embedder.encode(texts, show_progress_bar=True)
+        if not texts:
+            return self.embedder.encode(texts)
+        
+        if cache:
+            keys = [self._embedding_key(text) for text in texts]
+            vectors = self._cached_embeddings(keys)
+        else:
+            keys = texts
+            vectors = {}
+        
+        # Encode each distinct uncached text once, then remember it
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                missing.setdefault(key, text)
+        if missing:
+            fresh = self._encode(list(missing.values()))
+            fresh_vectors = dict(zip(missing, fresh))
+            if cache:
+                with self._embedding_cache:
+                    self._embedding_cache.executemany(
+                        "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                        [(key, np.asarray(vector, dtype=np.float32).tobytes())
+                         for key, vector in fresh_vectors.items()]
+                    )
+            vectors.update(fresh_vectors)
+        
+        return np.stack([vectors[key] for key in keys]).astype(np.float32, copy=False)
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Run the embedding model, across CPU worker processes for large batches"""
+        if len(texts) >= PARALLEL_EMBED_MIN_TEXTS and self.embedder.device.type == "cpu":
+            return self.embed_batch_parallel(texts)
+        # fp16 models return float16; callers always get float32
+        return self.embedder.encode(texts, show_progress_bar=True).astype(np.float32, copy=False)
+    
+    def _open_embedding_cache(self) -> sqlite3.Connection:
+        """Open (creating if needed) the embedding cache in the persist directory"""
+        connection = sqlite3.connect(os.path.join(self.persist_directory, EMBEDDING_CACHE_FILE))
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        return connection
+    
+    def _embedding_key(self, text: str) -> bytes:
+        """Cache key for text under the loaded model and precision"""
+        key = f"{self.embedding_model}\0{self.embedding_precision}\0{text}"
+        return hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+    
+    def _cached_embeddings(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """Look up cached embeddings; keys without an entry are absent from the result"""
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        for start in range(0, len(unique_keys), EMBEDDING_CACHE_QUERY_CHUNK):
+            chunk = unique_keys[start:start + EMBEDDING_CACHE_QUERY_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._embedding_cache.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+            )
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+    
+    def embed_batch_parallel(self, texts: List[str], num_workers: Optional[int] = None) -> np.ndarray:
+        """
+        Generate embeddings for many texts across CPU worker processes
+        
+        Args:
+            texts: List of texts to embed
+            num_workers: Worker processes (default: CPU count, capped)
+        
+        Returns:
+            Array of embeddings, in input order
+        """
+        if num_workers is None:
+            num_workers = min(os.cpu_count() or 1, PARALLEL_EMBED_MAX_WORKERS)
+        if num_workers < 2:
+            return self.embedder.encode(texts, show_progress_bar=True)
+        
+        # Each worker loads its own copy of the model and encodes a chunk
+        pool = self.embedder.start_multi_process_pool(target_devices=["cpu"] * num_workers)
+        try:
+            return self.embedder.encode_multi_process(texts, pool, batch_size=PARALLEL_EMBED_BATCH_SIZE)
+        finally:
+            self.embedder.stop_multi_process_pool(pool)
     
     def compute_similarity(self, vec1: np.ndarray, vec2: np.ndarray) -> float:
         """
@@ -158,7 +301,25 @@ class VectorDatabase:
         Returns:
             Cosine similarity score
         """
-        return np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
+        # sqrt(dot(v, v)) is what np.linalg.norm computes for a 1-D vector,
+        # without its argument handling on every call
+        return np.dot(vec1, vec2) / np.sqrt(np.dot(vec1, vec1) * np.dot(vec2, vec2))
+    
+    def compute_similarity_batch(self, query: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+        """
+        Compute cosine similarity between a vector and every row of a matrix
+        
+        Args:
+            query: Query vector
+            matrix: 2-D array with one vector per row
+        
+        Returns:
+            Array of cosine similarity scores, one per row
+        """
+        query = np.asarray(query)
+        matrix = np.asarray(matrix)
+        # One matrix-vector product and one row-norm pass instead of a call per row
+        return (matrix @ query) / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(query))
     
     def find_similar(self, query_vector: np.ndarray, top_k: int = 5) -> List[Dict[str, Any]]:
         """
@@ -199,4 +360,5 @@ class VectorDatabase:
             name="sensitive_data",
             metadata={"description": "Sensitive information vectors for research"}
         )
+        self._version += 1
         print("[OK] Cleared all vectors")